@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_KEY = 'auth-user:{}'
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the user's minimal state in the cache for
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds, so a cache hit authenticates without a query.
+
+    ``request.user`` is then a ``CustomUser`` loaded with only ``CACHED_USER_FIELDS``;
+    the other fields are deferred, so reading one loads it and ``save()`` writes only
+    the loaded fields.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares the password hash, which is never cached.
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        state = cache.get(user_cache_key(user_id))
+        if state is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                user_cache_key(user_id),
+                {field: getattr(user, field) for field in CACHED_USER_FIELDS},
+                settings.AUTH_USER_CACHE_TIMEOUT,
+            )
+            return user
+
+        if not state['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # from_db() takes the values in the model's field order.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields if field.attname in CACHED_USER_FIELDS
+        ]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, field_names, [state[field] for field in field_names])
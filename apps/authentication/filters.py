@@ -0,0 +1,13 @@
+from django_filters import rest_framework as filters
+
+from .models import CustomUser
+
+
+class UserFilter(filters.FilterSet):
+    # Case-insensitive matches compile to LIKE, which the NOCASE indexes serve.
+    username = filters.CharFilter(lookup_expr='iexact')
+    email = filters.CharFilter(lookup_expr='iexact')
+
+    class Meta:
+        model = CustomUser
+        fields = ['username', 'email']
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from apps.authentication.models import OutboxEmail
+from apps.authentication.outbox import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued activation and password-reset emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, help="Keep polling the outbox every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            stats = deliver_outbox(batch_size=options['batch_size'])
+            self.report(stats)
+            if sum(stats.values()) == options['batch_size']:
+                continue  # A full batch means more email may already be due.
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+        totals = dict(OutboxEmail.objects.order_by().values_list('status').annotate(total=Count('id')))
+        self.stdout.write(f"Outbox totals: {totals}")
+
+    def report(self, stats):
+        if any(stats.values()):
+            self.stdout.write(
+                f"Sent {stats['sent']}, retrying {stats['retrying']}, failed {stats['failed']}."
+            )
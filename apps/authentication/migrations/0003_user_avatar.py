@@ -0,0 +1,74 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:21
+
+import hashlib
+import io
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from PIL import Image
+
+BATCH_SIZE = 200
+
+
+def image_type(data):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return Image.MIME.get(image.format, 'application/octet-stream')
+    except Exception:
+        return 'application/octet-stream'
+
+
+def move_profile_images(apps, schema_editor):
+    CustomUser = apps.get_model('authentication', 'CustomUser')
+    UserAvatar = apps.get_model('authentication', 'UserAvatar')
+    db_alias = schema_editor.connection.alias
+    users = CustomUser.objects.using(db_alias).filter(profile_image__isnull=False).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).values_list('pk', 'profile_image')[:BATCH_SIZE])
+        if not batch:
+            break
+        UserAvatar.objects.using(db_alias).bulk_create([
+            UserAvatar(
+                user_id=pk,
+                data=bytes(data),
+                content_type=image_type(bytes(data)),
+                etag=hashlib.sha256(bytes(data)).hexdigest(),
+            )
+            for pk, data in batch if data
+        ])
+        last_pk = batch[-1][0]
+
+
+def restore_profile_images(apps, schema_editor):
+    CustomUser = apps.get_model('authentication', 'CustomUser')
+    UserAvatar = apps.get_model('authentication', 'UserAvatar')
+    db_alias = schema_editor.connection.alias
+    for avatar in UserAvatar.objects.using(db_alias).iterator(chunk_size=BATCH_SIZE):
+        CustomUser.objects.using(db_alias).filter(pk=avatar.user_id).update(profile_image=avatar.data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_alter_customuser_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAvatar',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='avatar', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('data', models.BinaryField()),
+                ('content_type', models.CharField(max_length=100)),
+                ('etag', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(move_profile_images, restore_profile_images),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='profile_image',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:23
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0003_user_avatar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.comparison.Collate('username', 'NOCASE'), name='user_username_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.comparison.Collate('email', 'NOCASE'), name='user_email_nocase_idx'),
+        ),
+    ]
@@ -1,9 +1,14 @@
+import hashlib
+import io
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Collate
+from django.utils import timezone
+from PIL import Image
 
 
 class CustomUser(AbstractUser):
-    profile_image = models.BinaryField(blank=True, null=True)
     is_active = models.BooleanField(default=False)
 
     groups = models.ManyToManyField(
@@ -17,5 +22,78 @@ class CustomUser(AbstractUser):
         blank=True,
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Collate('username', 'NOCASE'), name='user_username_nocase_idx'),
+            models.Index(Collate('email', 'NOCASE'), name='user_email_nocase_idx'),
+        ]
+
     def __str__(self):
         return self.username
+
+
+class UserAvatar(models.Model):
+    """Profile image bytes, kept out of the user row that every authenticated request loads."""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='avatar')
+    data = models.BinaryField()
+    content_type = models.CharField(max_length=100)
+    etag = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Avatar of {self.user_id}'
+
+    def set_image(self, data):
+        self.data = data
+        self.etag = hashlib.sha256(data).hexdigest()
+        self.content_type = guess_image_type(data)
+
+
+class OutboxEmail(models.Model):
+    """Email written in the request transaction and delivered later by ``send_outbox_email``."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.recipients)} ({self.status})'
+
+
+class RevokedToken(models.Model):
+    """Refresh token revoked before its expiry; rows are useless after ``expires_at``."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+
+def guess_image_type(data):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return Image.MIME.get(image.format, 'application/octet-stream')
+    except Exception:
+        return 'application/octet-stream'
+
+
+def avatar_version(etag):
+    """The ``?v=`` of avatar URLs: an etag prefix, so the URL changes with the image."""
+    return etag[:16]
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def queue_email(subject, body, from_email, recipients):
+    """Store an email for background delivery; call it inside the transaction that triggers it."""
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, recipients=list(recipients)
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+    ))
+
+
+def claim_due_emails(batch_size):
+    """
+    Lease up to ``batch_size`` due emails to this worker and return them.
+
+    The lease moves ``next_attempt_at`` past the send, so other workers skip the rows,
+    and a worker that dies mid-batch leaves them due again once it expires. The attempt
+    is counted here, so an email that crashes its worker still runs out of attempts.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+            )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def record_failure(email, error, stats):
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+        stats['failed'] += 1
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        stats['retrying'] += 1
+
+
+def deliver_outbox(batch_size=100):
+    """
+    Send one batch of due emails over a single SMTP connection and return
+    ``{'sent': n, 'retrying': n, 'failed': n}``. Failed sends back off exponentially
+    until ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is reached.
+
+    No transaction is open while talking to the mail server: with SQLite's IMMEDIATE
+    transactions that would hold the write lock, and stall every signup, for the
+    whole batch. Rows are claimed in one short transaction and the outcomes written
+    back in another.
+    """
+    stats = {'sent': 0, 'retrying': 0, 'failed': 0}
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return stats
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error, stats)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.recipients, connection=connection
+                )
+                try:
+                    message.send(fail_silently=False)
+                except Exception as error:
+                    record_failure(email, error, stats)
+                else:
+                    email.status = OutboxEmail.SENT
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    stats['sent'] += 1
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.bulk_update(emails, ['status', 'next_attempt_at', 'last_error', 'sent_at'])
+    return stats
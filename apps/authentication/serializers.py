@@ -2,10 +2,12 @@ from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.urls import reverse
-from django.core.mail import send_mail
 
-from .models import CustomUser
+from .models import CustomUser, UserAvatar, avatar_version
+from .outbox import queue_email
+from .tokens import RevocableRefreshToken
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -37,10 +39,42 @@ class ActivateSerializer(serializers.Serializer):
     token = serializers.CharField()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ProfileImageSerializer(serializers.ModelSerializer):
+    profile_image = serializers.ImageField(write_only=True, required=False)
+    profile_image_url = serializers.SerializerMethodField()
+
+    def get_profile_image_url(self, obj):
+        """Versioned avatar URL, so it can be cached for good and still change with the image."""
+        if hasattr(obj, 'avatar_etag'):
+            etag = obj.avatar_etag
+        else:
+            etag = UserAvatar.objects.filter(user=obj).values_list('etag', flat=True).first()
+        if not etag:
+            return None
+        url = f"{reverse('user-avatar', kwargs={'pk': obj.pk})}?v={avatar_version(etag)}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def update(self, instance, validated_data):
+        image = validated_data.pop('profile_image', None)
+        instance = super().update(instance, validated_data)
+        if image is not None:
+            avatar = UserAvatar(user=instance)
+            avatar.set_image(b''.join(image.chunks()))
+            avatar.save()
+        return instance
+
+
+class UserSerializer(ProfileImageSerializer):
     class Meta:
         model = CustomUser
-        fields = ["username", "email", "first_name", "last_name", "profile_image"]
+        fields = ["username", "email", "first_name", "last_name", "profile_image", "profile_image_url"]
+
+
+class UserListSerializer(ProfileImageSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ["id", "username", "email", "first_name", "last_name", "profile_image_url"]
 
 
 class PasswordResetSerializer(serializers.Serializer):
@@ -53,9 +87,9 @@ class PasswordResetSerializer(serializers.Serializer):
         token = default_token_generator.make_token(user)
         uid = urlsafe_base64_encode(str(user.pk).encode())
         activation_link = self.context['request'].build_absolute_uri(
-            reverse("password-reset-confirm", kwargs={"uidb64": uid, "token": token})
+            reverse("password-reset-confirm-password-reset-confirm", kwargs={"uidb64": uid, "token": token})
         )
-        send_mail(
+        queue_email(
             "Password Reset Request",
             f"Click the link to reset your password: {activation_link}",
             "your_email@example.com",
@@ -81,7 +115,11 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
             raise serializers.ValidationError("Invalid token or user.")
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(ProfileImageSerializer):
     class Meta:
         model = CustomUser
         fields = '__all__'
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
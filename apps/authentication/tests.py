@@ -0,0 +1,381 @@
+import hashlib
+from datetime import timedelta
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication
+from .models import CustomUser, OutboxEmail, RevokedToken, UserAvatar
+from .outbox import claim_due_emails, deliver_outbox, queue_email
+from .tokens import RevocableRefreshToken, RevocationFilter, is_revoked
+
+# Tests must not need a Redis server.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException('Mail server unavailable')
+
+
+class TransactionCheckingEmailBackend(EmailBackend):
+    """Records whether a transaction was open while sending."""
+    in_transaction = []
+
+    def send_messages(self, messages):
+        self.in_transaction.append(connection.in_atomic_block)
+        return super().send_messages(messages)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS=60,
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS=90,
+    EMAIL_OUTBOX_LEASE_SECONDS=600,
+)
+class OutboxTests(TestCase):
+    def make_due(self):
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_registration_queues_email(self):
+        response = APIClient().post(
+            reverse('register-list'), {'username': 'new', 'email': 'new@example.com', 'password': 'secret-password'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(deliver_outbox(), {'sent': 1, 'retrying': 0, 'failed': 0})
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertIn('/register/activate/', mail.outbox[0].body)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts, email.last_error), (OutboxEmail.SENT, 1, ''))
+        self.assertIsNotNone(email.sent_at)
+
+    def test_batch_is_sent_once(self):
+        for i in range(5):
+            queue_email('Subject', 'Body', 'from@example.com', [f'user{i}@example.com'])
+        self.assertEqual(deliver_outbox(batch_size=3)['sent'], 3)
+        self.assertEqual(deliver_outbox(batch_size=3)['sent'], 2)
+        self.assertEqual(deliver_outbox(batch_size=3), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'user{i}@example.com' for i in range(5)])
+
+    def test_retry_backoff_and_give_up(self):
+        queue_email('Subject', 'Body', 'from@example.com', ['user@example.com'])
+        with self.settings(EMAIL_BACKEND='apps.authentication.tests.FailingEmailBackend'):
+            for attempt, delay in ((1, 60), (2, 90)):
+                started = timezone.now()
+                self.assertEqual(deliver_outbox(), {'sent': 0, 'retrying': 1, 'failed': 0})
+                email = OutboxEmail.objects.get()
+                self.assertEqual((email.status, email.attempts), (OutboxEmail.PENDING, attempt))
+                self.assertEqual(email.last_error, 'Mail server unavailable')
+                # Backing off: not due yet.
+                self.assertAlmostEqual(
+                    (email.next_attempt_at - started).total_seconds(), delay, delta=5
+                )
+                self.assertEqual(deliver_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+                self.make_due()
+
+            self.assertEqual(deliver_outbox(), {'sent': 0, 'retrying': 0, 'failed': 1})
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.FAILED, 3))
+        self.make_due()
+        self.assertEqual(deliver_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(mail.outbox, [])
+
+    def test_retry_then_success(self):
+        queue_email('Subject', 'Body', 'from@example.com', ['user@example.com'])
+        with self.settings(EMAIL_BACKEND='apps.authentication.tests.FailingEmailBackend'):
+            deliver_outbox()
+        self.make_due()
+        self.assertEqual(deliver_outbox(), {'sent': 1, 'retrying': 0, 'failed': 0})
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts, email.last_error), (OutboxEmail.SENT, 2, ''))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_emails_are_leased(self):
+        queue_email('Subject', 'Body', 'from@example.com', ['user@example.com'])
+        # A worker that claimed the email and died before recording the outcome.
+        self.assertEqual(len(claim_due_emails(10)), 1)
+        self.assertEqual(deliver_outbox(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        # Once the lease runs out the email is due again, with the lost attempt counted.
+        self.make_due()
+        self.assertEqual(deliver_outbox()['sent'], 1)
+        self.assertEqual(OutboxEmail.objects.get().attempts, 2)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, EMAIL_BACKEND='apps.authentication.tests.TransactionCheckingEmailBackend'
+)
+class OutboxTransactionTests(TransactionTestCase):
+    def test_no_transaction_open_while_sending(self):
+        # With IMMEDIATE transactions on SQLite, an open transaction would hold the
+        # database write lock for as long as the mail server takes.
+        TransactionCheckingEmailBackend.in_transaction.clear()
+        queue_email('Subject', 'Body', 'from@example.com', ['user@example.com'])
+        self.assertEqual(deliver_outbox()['sent'], 1)
+        self.assertEqual(TransactionCheckingEmailBackend.in_transaction, [False])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'password', is_active=True)
+
+    def setUp(self):
+        self.authentication = CachedJWTAuthentication()
+        self.token = self.authentication.get_validated_token(str(AccessToken.for_user(self.user)))
+        self.authentication.get_user(self.token)  # Fills the cache.
+
+    def test_cache_hit_needs_no_query(self):
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.username, user.is_staff), (self.user.pk, 'reader', False))
+
+    def test_other_fields_are_deferred(self):
+        user = self.authentication.get_user(self.token)
+        self.assertEqual(user.get_deferred_fields(), {
+            field.attname for field in CustomUser._meta.concrete_fields
+        } - {'id', 'username', 'is_active', 'is_staff', 'is_superuser'})
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'reader@example.com')
+
+    def test_save_keeps_unloaded_fields(self):
+        user = self.authentication.get_user(self.token)
+        user.first_name = 'Renamed'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Renamed')
+        self.assertEqual(self.user.email, 'reader@example.com')
+        self.assertTrue(self.user.check_password('password'))
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AvatarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'password', is_active=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user-avatar', args=[self.user.pk])
+
+    def upload(self, color):
+        image = SimpleUploadedFile('avatar.png', png(color), content_type='image/png')
+        response = self.client.patch(reverse('user-detail', args=[self.user.pk]), {'profile_image': image})
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(reverse('user-detail', args=[self.user.pk])).data['profile_image_url']
+
+    def test_versioned_url_is_immutable(self):
+        url = self.upload('red')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), png('red'))
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_unversioned_url_is_revalidated(self):
+        self.upload('red')
+        for query in ({}, {'v': 'outdated'}):
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Cache-Control'], 'public, no-cache')
+            self.assertTrue(response.has_header('ETag'))
+
+    def test_not_modified(self):
+        self.upload('red')
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_reupload_changes_version(self):
+        old_url = self.upload('red')
+        etag = self.client.get(self.url)['ETag']
+        new_url = self.upload('blue')
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(b''.join(self.client.get(new_url).streaming_content), png('blue'))
+        # The unversioned URL revalidates to the new image.
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+        # The old version is now just another URL to revalidate.
+        self.assertEqual(self.client.get(old_url)['Cache-Control'], 'public, no-cache')
+
+    def test_no_avatar(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertIsNone(self.client.get(reverse('user-detail', args=[self.user.pk])).data['profile_image_url'])
+
+
+class AvatarMigrationTests(TransactionTestCase):
+    before = [('authentication', '0002_alter_customuser_is_active')]
+    after = [('authentication', '0003_user_avatar')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_profile_images_move_to_avatars(self):
+        old_apps = self.migrate(self.before)
+        User = old_apps.get_model('authentication', 'CustomUser')
+        with_image = User.objects.create(username='with', profile_image=png('red'))
+        not_an_image = User.objects.create(username='garbled', profile_image=b'garbled')
+        without_image = User.objects.create(username='without')
+
+        new_apps = self.migrate(self.after)
+        UserAvatar = new_apps.get_model('authentication', 'UserAvatar')
+        avatars = {avatar.user_id: avatar for avatar in UserAvatar.objects.all()}
+        self.assertEqual(set(avatars), {with_image.pk, not_an_image.pk})
+        self.assertNotIn(without_image.pk, avatars)
+        avatar = avatars[with_image.pk]
+        self.assertEqual(
+            (bytes(avatar.data), avatar.content_type, avatar.etag),
+            (png('red'), 'image/png', hashlib.sha256(png('red')).hexdigest()),
+        )
+        self.assertEqual(avatars[not_an_image.pk].content_type, 'application/octet-stream')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'password', is_active=True)
+
+    def setUp(self):
+        cache.clear()
+        # A fresh process-local filter, so no test sees another's revocations.
+        self.filter = RevocationFilter()
+        self.enterContext(mock.patch('apps.authentication.tokens.revocation_filter', self.filter))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.refresh = str(RevocableRefreshToken.for_user(self.user))
+
+    def test_logout_revokes_the_refresh_token(self):
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': self.refresh}).status_code, 200)
+        response = self.client.post(reverse('logout-list'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': self.refresh}).status_code, 401)
+        self.assertEqual(self.client.post(reverse('logout-list'), {'refresh': self.refresh}).status_code, 400)
+
+    def test_logout_needs_a_token(self):
+        self.assertEqual(self.client.post(reverse('logout-list')).status_code, 400)
+        self.assertEqual(APIClient().post(reverse('logout-list'), {'refresh': self.refresh}).status_code, 401)
+
+    def test_unrevoked_token_skips_the_database(self):
+        self.filter.refresh()
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked('unrevoked'))
+
+    def test_false_positive_falls_back_to_the_database(self):
+        self.filter.add('unrevoked')
+        with self.assertNumQueries(1):
+            self.assertFalse(is_revoked('unrevoked'))
+
+    @override_settings(TOKEN_REVOCATION_FILTER_REFRESH_SECONDS=0)
+    def test_revocation_by_another_process(self):
+        self.filter.refresh()
+        # Another process revoked it: in the database only, not in this cache or filter.
+        RevokedToken.objects.create(jti='elsewhere', expires_at=timezone.now() + timedelta(hours=1))
+        self.assertTrue(is_revoked('elsewhere'))
+
+    def test_expired_revocations_are_ignored(self):
+        RevokedToken.objects.create(jti='expired', expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(is_revoked('expired'))
+
+    def test_prune(self):
+        now = timezone.now()
+        for i in range(3):
+            RevokedToken.objects.create(jti=f'expired-{i}', expires_at=now - timedelta(minutes=i + 1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(hours=1))
+        output = StringIO()
+        call_command('prune_revoked_tokens', batch_size=2, stdout=output)
+        self.assertIn('Pruned 3 expired revoked tokens.', output.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UserListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # No passwords: hashing 25 of them would dominate the test.
+        cls.users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'user{i:02}', email=f'user{i:02}@example.com', is_active=True) for i in range(25)
+        ])
+        avatar = UserAvatar(user=cls.users[0])
+        avatar.set_image(png('red'))
+        avatar.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_query_budget(self):
+        # Count, page with the avatar etags.
+        for page_size in (5, 25):
+            with self.assertNumQueries(2) as queries:
+                response = self.client.get(reverse('user-list'), {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+        # Only the listed columns are read, never the password hash.
+        self.assertNotIn('password', queries.captured_queries[-1]['sql'])
+
+    def test_paginated_shape(self):
+        response = self.client.get(reverse('user-list'), {'page_size': 10, 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 25)
+        self.assertTrue(response.data['next'].endswith('page=3&page_size=10'))
+        self.assertIsNotNone(response.data['previous'])
+        self.assertEqual(
+            list(response.data['results'][0]),
+            ['id', 'username', 'email', 'first_name', 'last_name', 'profile_image_url'],
+        )
+        self.assertEqual([user['username'] for user in response.data['results']], [f'user{i}' for i in range(10, 20)])
+
+    def test_cursor_pagination(self):
+        response = self.client.get(reverse('user-list'), {'pagination': 'cursor', 'page_size': 20})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 20)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], [f'user{i}' for i in range(20, 25)])
+
+    def test_avatar_url(self):
+        results = self.client.get(reverse('user-list'), {'page_size': 2}).data['results']
+        self.assertIn('/avatar/?v=', results[0]['profile_image_url'])
+        self.assertIsNone(results[1]['profile_image_url'])
+
+    def test_search_and_filters(self):
+        def usernames(**params):
+            return [user['username'] for user in self.client.get(reverse('user-list'), params).data['results']]
+
+        self.assertEqual(usernames(search='USER2'), ['user20', 'user21', 'user22', 'user23', 'user24'])
+        self.assertEqual(usernames(search='user07@'), ['user07'])
+        self.assertEqual(usernames(username='USER03'), ['user03'])
+        self.assertEqual(usernames(email='User04@Example.com'), ['user04'])
+        self.assertEqual(usernames(search='nobody'), [])
+
+    def test_anonymous(self):
+        self.assertEqual(APIClient().get(reverse('user-list')).status_code, 401)
@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RevokedToken
+
+REVOKED_CACHE_KEY = 'revoked-token:{}'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: ``in`` never misses an added key, false positives are rare."""
+
+    def __init__(self, size_bits=2 ** 20, hash_count=7):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bytearray(size_bits // 8)
+
+    def _positions(self, key):
+        digest = hashlib.sha256(key.encode()).digest()
+        for i in range(self.hash_count):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], 'big') % self.size_bits
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, key):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    """
+    Process-local Bloom filter over the revoked jtis.
+
+    New revocations are pulled by id every ``TOKEN_REVOCATION_FILTER_REFRESH_SECONDS``
+    and the filter is rebuilt without expired rows every
+    ``TOKEN_REVOCATION_FILTER_REBUILD_SECONDS``, so a jti revoked by another process
+    can pass the pre-check for at most one refresh interval.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.refreshed_at = 0
+        self.built_at = 0
+
+    def might_contain(self, jti):
+        self.refresh()
+        return jti in self.bloom
+
+    def add(self, jti):
+        self.refresh()
+        self.bloom.add(jti)
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.bloom is not None and now - self.refreshed_at < settings.TOKEN_REVOCATION_FILTER_REFRESH_SECONDS:
+            return
+        with self.lock:
+            if self.bloom is None or now - self.built_at >= settings.TOKEN_REVOCATION_FILTER_REBUILD_SECONDS:
+                bloom, last_id = BloomFilter(), 0
+                self.built_at = now
+            else:
+                bloom, last_id = self.bloom, self.last_id
+            rows = RevokedToken.objects.filter(id__gt=last_id, expires_at__gt=timezone.now())
+            for pk, jti in rows.order_by('id').values_list('id', 'jti').iterator():
+                bloom.add(jti)
+                last_id = pk
+            self.bloom, self.last_id, self.refreshed_at = bloom, last_id, now
+
+
+revocation_filter = RevocationFilter()
+
+
+def is_revoked(jti):
+    if not revocation_filter.might_contain(jti):
+        return False
+    revoked = cache.get(REVOKED_CACHE_KEY.format(jti))
+    if revoked is None:
+        revoked = RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+    return revoked
+
+
+def revoke(jti, exp):
+    expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+    try:
+        RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+    except IntegrityError:
+        pass  # Revoked concurrently.
+    ttl = int((expires_at - timezone.now()).total_seconds())
+    if ttl > 0:
+        cache.set(REVOKED_CACHE_KEY.format(jti), True, ttl)
+    revocation_filter.add(jti)
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token checked against the revoked-token store instead of simplejwt's blacklist app."""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
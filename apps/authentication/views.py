@@ -1,14 +1,21 @@
+import io
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.filters import SearchFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.urls import reverse
-from django.core.mail import send_mail
-from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
 
 from .serializers import (
     RegisterSerializer,
@@ -16,9 +23,14 @@ from .serializers import (
     LoginSerializer,
     PasswordResetSerializer,
     PasswordResetConfirmSerializer,
-    CustomUserSerializer
+    CustomUserSerializer,
+    UserListSerializer,
 )
-from .models import CustomUser
+from .filters import UserFilter
+from .outbox import queue_email
+from .tokens import RevocableRefreshToken
+from .models import CustomUser, UserAvatar, avatar_version
+from ..common import HybridPaginationClass
 
 
 class RegisterViewSet(viewsets.GenericViewSet):
@@ -34,19 +46,19 @@ class RegisterViewSet(viewsets.GenericViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer_class()(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(str(user.pk).encode())
-            activation_link = request.build_absolute_uri(
-                reverse("register-activate", kwargs={"uidb64": uid, "token": token})
-            )
-            send_mail(
-                "Activate Your Account",
-                f"Click the link to activate your account: {activation_link}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
+            with transaction.atomic():
+                user = serializer.save()
+                token = default_token_generator.make_token(user)
+                uid = urlsafe_base64_encode(str(user.pk).encode())
+                activation_link = request.build_absolute_uri(
+                    reverse("register-activate", kwargs={"uidb64": uid, "token": token})
+                )
+                queue_email(
+                    "Activate Your Account",
+                    f"Click the link to activate your account: {activation_link}",
+                    settings.EMAIL_HOST_USER,
+                    [user.email],
+                )
             return Response({"message": "User registered. Activation email sent."}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -125,14 +137,22 @@ class PasswordResetConfirmViewSet(viewsets.GenericViewSet):
 class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = CustomUserSerializer
-    queryset = CustomUser.objects.all()
+    queryset = CustomUser.objects.annotate(
+        avatar_etag=Subquery(UserAvatar.objects.filter(user=OuterRef('pk')).values('etag')[:1])
+    )
+    avatar_max_age = 60 * 60 * 24 * 365
+    pagination_class = HybridPaginationClass
+    cursor_ordering = 'id'
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_class = UserFilter
+    search_fields = ['^username', '^email']
+    list_fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
     def update(self, request, *args, **kwargs):
-        user = request.user
         requested_user = self.get_object()
-        if user != requested_user:
+        if request.user != requested_user:
             return Response({"error": "User doesn't match"}, status=status.HTTP_403_FORBIDDEN)
-        serializer = self.serializer_class(user, data=request.data, partial=True)
+        serializer = self.serializer_class(requested_user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Profile updated successfully"}, status=status.HTTP_200_OK)
@@ -147,8 +167,29 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
     def list(self, request, *args, **kwargs):
-        serializer = self.serializer_class(self.queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset()).only(*self.list_fields).order_by('id')
+        page = self.paginate_queryset(queryset)
+        serializer = UserListSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"], permission_classes=[AllowAny])
+    def avatar(self, request, pk=None):
+        meta = UserAvatar.objects.filter(user_id=pk).values('etag', 'content_type').first()
+        if meta is None:
+            raise Http404
+        etag = quote_etag(meta['etag'])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = UserAvatar.objects.filter(user_id=pk).values_list('data', flat=True).first()
+            response = FileResponse(io.BytesIO(data), content_type=meta['content_type'])
+        response['ETag'] = etag
+        if request.query_params.get('v') == avatar_version(meta['etag']):
+            # Serializers hand out URLs versioned by the etag, so a cached copy never goes stale.
+            patch_cache_control(response, public=True, max_age=self.avatar_max_age, immutable=True)
+        else:
+            # Any other URL keeps serving the latest image, so caches must revalidate it.
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
 
 
 class LogoutViewSet(viewsets.GenericViewSet):
@@ -163,7 +204,7 @@ class LogoutViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            token = RefreshToken(refresh_token)
+            token = RevocableRefreshToken(refresh_token)
             token.blacklist()
 
             return Response({"message": "Successfully logged out."}, status=status.HTTP_200_OK)
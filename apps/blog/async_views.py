@@ -0,0 +1,204 @@
+"""
+Async read-only views for the hot blog endpoints.
+
+The DRF viewsets in ``views.py`` are synchronous, so under ``server.asgi`` every
+request is handed to a worker thread for its whole lifetime. These views run on
+the event loop and only leave it for the individual ORM and cache calls, which
+Django still executes through its sync adapter. They mirror the response bodies,
+filters and conditional GET of the DRF ``list``/``retrieve`` actions; writes,
+search and cursor pagination stay on the DRF routes.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .caching import response_cache_key, record_cache_outcome
+from .exporting import apply_date_range
+from .filters import BlogFilter
+from .models import Blog, Comment, Tag, Menu, Category
+from .serializers import (
+    BlogSerializer,
+    BlogListSerializer,
+    CommentSerializer,
+    TagSerializer,
+    MenuSerializer,
+    CategorySerializer
+)
+from .views import build_comment_tree, build_category_tree
+from ..common import ConditionalGetMixin, PaginationClass
+
+
+def not_found(model):
+    return JsonResponse({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+class AsyncReadView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    def get_page_params(self):
+        """Page number and size read the same way as ``PaginationClass``; ``None`` for an invalid page."""
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            return None
+        try:
+            page_size = int(self.request.GET.get(PaginationClass.page_size_query_param, ''))
+        except ValueError:
+            page_size = PaginationClass.page_size
+        if page_size <= 0:
+            page_size = PaginationClass.page_size
+        return page, min(page_size, PaginationClass.max_page_size)
+
+    def paginated_response(self, count, page, page_size, results):
+        url = self.request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if page * page_size < count else None
+        if page <= 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return JsonResponse({'count': count, 'next': next_url, 'previous': previous_url, 'results': results})
+
+
+class AsyncBlogListView(ConditionalGetMixin, AsyncReadView):
+    etag_fields = ('comment_count',)
+
+    async def get(self, request):
+        queryset = (
+            Blog.objects.prefetch_related('tags')
+            .order_by('-created_at', '-id')
+            .defer('description', 'search_text')
+        )
+        filterset = BlogFilter(request.GET, queryset=queryset, request=request)
+        # Validating the choice filters looks the chosen rows up.
+        if not await sync_to_async(filterset.is_valid)():
+            return JsonResponse(filterset.errors, status=400)
+        queryset = apply_date_range(filterset.qs, request.GET.get('start_date'), request.GET.get('end_date'))
+
+        etag, last_modified = await self.aget_list_validators(queryset)
+        return await self.aconditional_response(request, etag, last_modified, lambda: self.build_response(queryset))
+
+    async def build_response(self, queryset):
+        params = self.get_page_params()
+        count = await queryset.acount()
+        if params is None or params[0] < 1 or (params[0] - 1) * params[1] >= max(count, 1):
+            return JsonResponse({'detail': 'Invalid page.'}, status=404)
+        page, page_size = params
+        blogs = [blog async for blog in queryset[(page - 1) * page_size:page * page_size]]
+        serializer = BlogListSerializer(blogs, many=True, context={'request': self.request})
+        return self.paginated_response(count, page, page_size, serializer.data)
+
+
+class AsyncBlogDetailView(ConditionalGetMixin, AsyncReadView):
+    etag_fields = ('comment_count',)
+
+    async def get(self, request, pk):
+        queryset = Blog.objects.prefetch_related('tags').defer('search_text')
+        try:
+            instance = await queryset.aget(pk=pk)
+        except Blog.DoesNotExist:
+            return not_found(Blog)
+
+        async def build_response():
+            return JsonResponse(BlogSerializer(instance, context={'request': request}).data)
+
+        etag, last_modified = self.get_object_validators(instance)
+        return await self.aconditional_response(request, etag, last_modified, build_response)
+
+
+class AsyncCommentThreadView(ConditionalGetMixin, AsyncReadView):
+    """The paginated comment tree of one blog, fetched with a single query like the DRF ``?blog=`` list."""
+
+    async def get(self, request):
+        blog_id = request.GET.get('blog')
+        if not blog_id or not blog_id.isdigit():
+            return JsonResponse({'blog': ['A valid blog id is required.']}, status=400)
+        queryset = Comment.objects.filter(blog=blog_id)
+
+        etag, last_modified = await self.aget_list_validators(queryset)
+        return await self.aconditional_response(request, etag, last_modified, lambda: self.build_response(queryset))
+
+    async def build_response(self, queryset):
+        roots, replies_map = build_comment_tree([comment async for comment in queryset])
+        params = self.get_page_params()
+        if params is None or params[0] < 1 or (params[0] - 1) * params[1] >= max(len(roots), 1):
+            return JsonResponse({'detail': 'Invalid page.'}, status=404)
+        page, page_size = params
+        serializer = CommentSerializer(roots[(page - 1) * page_size:page * page_size], many=True, context={
+            'request': self.request, 'replies_map': replies_map
+        })
+        return self.paginated_response(len(roots), page, page_size, serializer.data)
+
+
+class AsyncCachedView(AsyncReadView):
+    """Async counterpart of ``BaseViewSet``: responses are cached per namespace and version."""
+    model = None
+    serializer_class = None
+    cache_namespace = None
+    cache_timeout = 60 * 60
+    action = 'list'
+
+    async def get(self, request, pk=None):
+        if pk is not None:
+            self.action = 'retrieve'
+        data = await self.cached_data(self.build_data, lookup=pk)
+        if data is None:
+            return not_found(self.model)
+        return JsonResponse(data, safe=False)
+
+    async def build_data(self):
+        queryset = self.model.objects.all()
+        if self.action == 'retrieve':
+            try:
+                instance = await queryset.aget(pk=self.kwargs['pk'])
+            except self.model.DoesNotExist:
+                return None
+            return self.serializer_class(instance).data
+        return self.serializer_class([obj async for obj in queryset], many=True).data
+
+    async def cached_data(self, build_data, lookup=None):
+        key, data = await sync_to_async(self.cache_lookup)(lookup)
+        if data is None:
+            data = await build_data()
+            if data is not None:
+                await cache.aset(key, data, self.cache_timeout)
+        return data
+
+    def cache_lookup(self, lookup):
+        # One hop to the sync thread for the version, the entry and the hit counter together.
+        key = response_cache_key(self.cache_namespace, self.request, self.action, lookup)
+        data = cache.get(key)
+        record_cache_outcome(self.cache_namespace, 'misses' if data is None else 'hits')
+        return key, data
+
+
+class AsyncTagView(AsyncCachedView):
+    model = Tag
+    serializer_class = TagSerializer
+    cache_namespace = 'tags'
+
+
+class AsyncMenuView(AsyncCachedView):
+    model = Menu
+    serializer_class = MenuSerializer
+    cache_namespace = 'menus'
+
+
+class AsyncCategoryView(AsyncCachedView):
+    model = Category
+    serializer_class = CategorySerializer
+    cache_namespace = 'categories'
+
+
+class AsyncCategoryTreeView(AsyncCategoryView):
+    action = 'tree'
+
+    async def get(self, request):
+        return JsonResponse(await self.cached_data(self.build_tree), safe=False)
+
+    async def build_tree(self):
+        categories = Category.objects.order_by('tree_id', 'lft').only('id', 'title', 'parent')
+        return build_category_tree([category async for category in categories])
@@ -0,0 +1,57 @@
+import hashlib
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'viewset-cache:version:{}'
+STATS_KEY = 'viewset-cache:stats:{}:{}'
+
+
+def _counter(key, initial=0):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, timeout=None)
+        return cache.incr(key)
+
+
+def get_cache_version(namespace):
+    version = cache.get(VERSION_KEY.format(namespace))
+    if version is None:
+        # Seed from the clock so a lost version key never reuses an old version.
+        cache.add(VERSION_KEY.format(namespace), time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY.format(namespace))
+    return version
+
+
+def invalidate_cache(namespace):
+    """
+    Drop every cached response of ``namespace`` in O(1) by moving to a new version.
+
+    Inside a transaction the version moves on commit: moved earlier, a concurrent
+    read could cache the uncommitted state under the new version until it expires.
+    """
+    transaction.on_commit(partial(_counter, VERSION_KEY.format(namespace), initial=time.time_ns()))
+
+
+def record_cache_outcome(namespace, outcome):
+    _counter(STATS_KEY.format(namespace, outcome))
+
+
+def get_cache_stats(namespace):
+    hits = cache.get(STATS_KEY.format(namespace, 'hits'), 0)
+    misses = cache.get(STATS_KEY.format(namespace, 'misses'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def response_cache_key(namespace, request, action, lookup=None):
+    url = f'{request.get_host()}{request.get_full_path()}'
+    digest = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+    return f'viewset-cache:{namespace}:{get_cache_version(namespace)}:{action}:{lookup}:{digest}'
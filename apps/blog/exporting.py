@@ -0,0 +1,77 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 2000
+
+BLOG_EXPORT_FIELDS = [
+    'id', 'title', 'description', 'main_image', 'author', 'category', 'tags',
+    'created_at', 'updated_at', 'active', 'word_count', 'reading_time', 'comment_count',
+]
+COMMENT_EXPORT_FIELDS = [
+    'id', 'blog', 'author', 'parent_comment', 'content', 'like', 'dislike', 'reply_count', 'updated_at',
+]
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def apply_date_range(queryset, start_date, end_date):
+    if start_date and end_date:
+        queryset = queryset.filter(created_at__range=[start_date, end_date])
+    return queryset
+
+
+def blog_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield one dict per blog, reading the table server-side ``chunk_size`` rows at a time."""
+    for blog in queryset.prefetch_related('tags').iterator(chunk_size=chunk_size):
+        yield {
+            'id': blog.id,
+            'title': blog.title,
+            'description': blog.description,
+            'main_image': blog.main_image.name,
+            'author': blog.author_id,
+            'category': blog.category_id,
+            'tags': [tag.id for tag in blog.tags.all()],
+            'created_at': blog.created_at,
+            'updated_at': blog.updated_at,
+            'active': blog.active,
+            'word_count': blog.word_count,
+            'reading_time': blog.reading_time,
+            'comment_count': blog.comment_count,
+        }
+
+
+def comment_rows(queryset, chunk_size=CHUNK_SIZE):
+    fields = ['id', 'blog_id', 'author_id', 'parent_comment_id', 'content', 'like', 'dislike',
+              'reply_count', 'updated_at']
+    for values in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield dict(zip(COMMENT_EXPORT_FIELDS, values))
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def render_csv(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            ';'.join(map(str, value)) if isinstance(value, list) else value
+            for value in (row[field] for field in fields)
+        ])
+
+
+def render(export_format, fields, rows):
+    if export_format == 'csv':
+        return render_csv(fields, rows)
+    return render_ndjson(rows)
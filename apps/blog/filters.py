@@ -0,0 +1,55 @@
+from django.db.models import Count
+from django_filters import rest_framework as filters
+
+from .models import Blog, Category, Tag
+
+
+def filter_blogs_by_tags(queryset, tag_ids, match_all=False):
+    """
+    Blogs with any or, with ``match_all``, every one of ``tag_ids``.
+
+    The tags are matched in one grouped subquery over the through table, so a
+    blog is never joined once per tag and no DISTINCT over the full row is needed.
+    """
+    matching = (
+        Blog.tags.through.objects.filter(tag_id__in=tag_ids)
+        .values('blog_id')
+        .annotate(matched=Count('tag_id'))
+        .filter(matched__gte=len(tag_ids) if match_all else 1)
+        .values('blog_id')
+    )
+    return queryset.filter(pk__in=matching)
+
+
+class BlogFilter(filters.FilterSet):
+    category_tree = filters.ModelChoiceFilter(
+        queryset=Category.objects.all(), method='filter_category_tree'
+    )
+    tags = filters.ModelMultipleChoiceFilter(queryset=Tag.objects.all(), method='filter_tags')
+    tags_match = filters.ChoiceFilter(
+        choices=[('any', 'Any of the tags'), ('all', 'All of the tags')], method='filter_tags_match'
+    )
+
+    class Meta:
+        model = Blog
+        fields = ['author', 'category', 'tags', 'active']
+
+    def filter_category_tree(self, queryset, name, value):
+        # The nested set range covers the category and all of its descendants.
+        return queryset.filter(
+            category__tree_id=value.tree_id,
+            category__lft__gte=value.lft,
+            category__lft__lte=value.rght,
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """Blogs with any (default) or, with ``tags_match=all``, every one of the tags."""
+        if not value:
+            return queryset
+        return filter_blogs_by_tags(
+            queryset, {tag.pk for tag in value}, match_all=self.form.cleaned_data.get('tags_match') == 'all'
+        )
+
+    def filter_tags_match(self, queryset, name, value):
+        # Read by filter_tags.
+        return queryset
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+VARIANTS_DIR = 'blogs/variants'
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def render_variants(source_path, output_dir, digest, widths, quality=80):
+    """
+    Write WebP copies of ``source_path`` at each width no larger than the original and
+    return ``{width: file name}``. Runs in a worker process, so it only touches files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    variants = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        fitting = [width for width in sorted(widths) if width < image.width] or [image.width]
+        for width in fitting:
+            height = round(image.height * width / image.width)
+            name = f'{digest}-{width}.webp'
+            image.resize((width, height), Image.LANCZOS).save(
+                os.path.join(output_dir, name), 'WEBP', quality=quality, method=4
+            )
+            variants[str(width)] = f'{VARIANTS_DIR}/{name}'
+    return variants
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.BLOG_IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+def save_variants(digest, variants):
+    from .models import Blog
+
+    # updated_at moves too, so conditional GETs see the new srcset.
+    Blog.objects.filter(main_image_hash=digest).update(image_variants=variants, updated_at=Now())
+
+
+def store_variants(digest, variants):
+    """Save from the pool's callback thread, which must not keep its own connection open."""
+    try:
+        save_variants(digest, variants)
+    finally:
+        connections.close_all()
+
+
+def _on_variants_ready(digest, future):
+    if future.exception() is not None:
+        logger.error("Generating image variants for %s failed", digest, exc_info=future.exception())
+        return
+    store_variants(digest, future.result())
+
+
+def enqueue_variants(image_name, digest):
+    """Generate the variants of a stored main image off the request path."""
+    args = (
+        default_storage.path(image_name),
+        default_storage.path(VARIANTS_DIR),
+        digest,
+        settings.BLOG_IMAGE_VARIANT_WIDTHS,
+    )
+    if not settings.BLOG_IMAGE_WORKERS:
+        save_variants(digest, render_variants(*args))
+        return
+    future = get_executor().submit(render_variants, *args)
+    future.add_done_callback(lambda done: _on_variants_ready(digest, done))
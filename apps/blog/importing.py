@@ -0,0 +1,86 @@
+from collections import Counter
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.authentication.models import CustomUser
+from .caching import invalidate_cache
+from .models import Blog, Category, Tag
+from .serializers import BlogImportSerializer
+
+
+def resolve_tags(names):
+    """Return ``{name: tag id}``, creating the missing tags with one bulk insert."""
+    tag_ids = {}
+    for pk, name in Tag.objects.filter(name__in=names).order_by('-id').values_list('id', 'name'):
+        tag_ids[name] = pk
+    missing = [Tag(name=name) for name in names if name not in tag_ids]
+    if missing:
+        for tag in Tag.objects.bulk_create(missing):
+            tag_ids[tag.name] = tag.pk
+        invalidate_cache('tags')
+    return tag_ids
+
+
+def import_blog_batch(rows, offset=0):
+    """
+    Validate ``rows`` and insert the valid ones with ``bulk_create``.
+
+    Returns ``(created, errors)``, where each error carries the row's position
+    (``offset`` + index) and its validation messages.
+    """
+    errors = []
+    valid = []
+    # One serializer validates every row, so its fields are only built once.
+    serializer = BlogImportSerializer()
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, serializer.run_validation(row)))
+        except ValidationError as error:
+            errors.append({'row': offset + index, 'errors': error.detail})
+
+    author_ids = set(CustomUser.objects.filter(
+        pk__in={data['author'] for _, data in valid}
+    ).values_list('pk', flat=True))
+    category_ids = set(Category.objects.filter(
+        pk__in={data['category'] for _, data in valid if data.get('category')}
+    ).values_list('pk', flat=True))
+
+    blogs, blog_tags = [], []
+    for index, data in valid:
+        row_errors = {}
+        if data['author'] not in author_ids:
+            row_errors['author'] = [f"Invalid pk \"{data['author']}\" - object does not exist."]
+        if data.get('category') and data['category'] not in category_ids:
+            row_errors['category'] = [f"Invalid pk \"{data['category']}\" - object does not exist."]
+        if row_errors:
+            errors.append({'row': offset + index, 'errors': row_errors})
+            continue
+        blog = Blog(
+            title=data['title'],
+            description=data['description'],
+            main_image=data['main_image'],
+            author_id=data['author'],
+            category_id=data.get('category'),
+            active=data['active'],
+        )
+        # bulk_create skips save(), so derive the summary fields here.
+        blog.update_summary_fields()
+        blogs.append(blog)
+        blog_tags.append(set(data['tags']))
+
+    with transaction.atomic():
+        Blog.objects.bulk_create(blogs)
+        tag_ids = resolve_tags({name for names in blog_tags for name in names})
+        Through = Blog.tags.through
+        links = [
+            Through(blog_id=blog.pk, tag_id=tag_ids[name])
+            for blog, names in zip(blogs, blog_tags)
+            for name in names
+        ]
+        Through.objects.bulk_create(links, ignore_conflicts=True)
+        # The bulk insert sends no m2m_changed, so the tag counts are kept here.
+        if links:
+            Tag.adjust_blog_counts(Counter(link.tag_id for link in links))
+            invalidate_cache('tags')
+    return len(blogs), errors
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.blog.models import Blog
+
+
+class Command(BaseCommand):
+    help = "Recompute excerpt, search text, word count and reading time for existing blogs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch, total = [], 0
+        for blog in Blog.objects.only('id', 'description').order_by('id').iterator(chunk_size=batch_size):
+            blog.update_summary_fields()
+            batch.append(blog)
+            if len(batch) >= batch_size:
+                total += self.flush(batch)
+                batch = []
+        total += self.flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"Updated {total} blogs."))
+
+    def flush(self, batch):
+        Blog.objects.bulk_update(batch, Blog.SUMMARY_FIELDS)
+        return len(batch)
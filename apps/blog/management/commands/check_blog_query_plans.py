@@ -0,0 +1,79 @@
+import itertools
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.blog.filters import filter_blogs_by_tags
+from apps.blog.models import Blog
+from apps.blog.views import BlogViewSet
+
+FULL_SCAN_RE = re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)')
+INDEX_SCAN_RE = re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX (\w+)')
+
+
+def blog_filter_combinations():
+    """Yield the filter names and a function applying them, as ``BlogFilter`` would."""
+    now = timezone.now()
+    filters = {
+        'author': lambda queryset: queryset.filter(author=1),
+        'category': lambda queryset: queryset.filter(category=1),
+        'category_tree': lambda queryset: queryset.filter(
+            category__tree_id=1, category__lft__gte=1, category__lft__lte=10
+        ),
+        'tags': lambda queryset: filter_blogs_by_tags(queryset, {1, 2}),
+        'tags_match_all': lambda queryset: filter_blogs_by_tags(queryset, {1, 2}, match_all=True),
+        'active': lambda queryset: queryset.filter(active=True),
+        'inactive': lambda queryset: queryset.filter(active=False),
+        'date_range': lambda queryset: queryset.filter(created_at__range=[now - timedelta(days=30), now]),
+    }
+    exclusive = [{'active', 'inactive'}, {'category', 'category_tree'}, {'tags', 'tags_match_all'}]
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            if any(pair <= set(names) for pair in exclusive):
+                continue
+
+            def apply(queryset, names=names):
+                for name in names:
+                    queryset = filters[name](queryset)
+                return queryset
+
+            yield names, apply
+
+
+def plan_problems(plan, filtered):
+    """
+    Return the plan lines that read a whole table, or walk a whole full index
+    when a filter could have narrowed it. Scans of partial indexes only visit
+    matching rows and are fine.
+    """
+    partial_indexes = {index.name for index in Blog._meta.indexes if index.condition is not None}
+    problems = []
+    for line in plan.splitlines():
+        index_scan = INDEX_SCAN_RE.search(line)
+        if FULL_SCAN_RE.search(line):
+            problems.append(line.strip())
+        elif filtered and index_scan and index_scan.group(2) not in partial_indexes:
+            problems.append(line.strip())
+    return problems
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN for every BlogViewSet filter combination and fail on full scans."
+
+    def handle(self, *args, **options):
+        page_size = BlogViewSet.pagination_class().paginator.page_size
+        failures = 0
+        for names, apply in blog_filter_combinations():
+            queryset = apply(BlogViewSet.queryset)[:page_size]
+            problems = plan_problems(queryset.explain(), filtered=bool(names))
+            label = ', '.join(names) or 'no filters'
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"{label}: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(f"{label}: ok")
+        if failures:
+            raise CommandError(f"{failures} filter combinations fall back to a scan.")
+        self.stdout.write(self.style.SUCCESS("All blog filter combinations use an index."))
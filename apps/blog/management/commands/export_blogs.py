@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog.exporting import (
+    BLOG_EXPORT_FIELDS,
+    COMMENT_EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    apply_date_range,
+    blog_rows,
+    comment_rows,
+    render,
+)
+from apps.blog.filters import BlogFilter
+from apps.blog.models import Blog, Comment
+
+
+class Command(BaseCommand):
+    help = "Stream blogs or comments as NDJSON or CSV in bounded memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['blogs', 'comments'], default='blogs')
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help="File to write to; stdout by default.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--author', type=int)
+        parser.add_argument('--category', type=int)
+        parser.add_argument('--start-date')
+        parser.add_argument('--end-date')
+        parser.add_argument('--blog', type=int, help="Only comments of this blog.")
+
+    def handle(self, *args, **options):
+        if options['model'] == 'blogs':
+            fields, rows = BLOG_EXPORT_FIELDS, blog_rows(self.blogs(options), options['chunk_size'])
+        else:
+            comments = Comment.objects.order_by('id')
+            if options['blog']:
+                comments = comments.filter(blog=options['blog'])
+            fields, rows = COMMENT_EXPORT_FIELDS, comment_rows(comments, options['chunk_size'])
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in render(options['export_format'], fields, rows):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    def blogs(self, options):
+        params = {name: options[name] for name in ('author', 'category') if options[name]}
+        filterset = BlogFilter(data=params, queryset=Blog.objects.order_by('id'))
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+        return apply_date_range(filterset.qs, options['start_date'], options['end_date'])
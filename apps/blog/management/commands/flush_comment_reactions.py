@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.blog.reactions import flush_reactions
+
+
+class Command(BaseCommand):
+    help = "Write buffered comment likes/dislikes to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, help="Keep flushing every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_reactions(batch_size=options['batch_size'])
+            self.stdout.write(f"Flushed reactions for {flushed} comments.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
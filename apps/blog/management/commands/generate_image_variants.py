@@ -0,0 +1,67 @@
+from concurrent.futures import as_completed
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.blog.imaging import VARIANTS_DIR, get_executor, hash_file, render_variants, save_variants
+from apps.blog.models import Blog
+
+
+def render_args(digest, name):
+    return (
+        default_storage.path(name),
+        default_storage.path(VARIANTS_DIR),
+        digest,
+        settings.BLOG_IMAGE_VARIANT_WIDTHS,
+    )
+
+
+class Command(BaseCommand):
+    help = "Hash blog main images and render their responsive variants where missing."
+
+    def handle(self, *args, **options):
+        pending, skipped = {}, 0
+        blogs = Blog.objects.filter(image_variants={}).exclude(main_image='').only('id', 'main_image')
+        for blog in blogs.iterator():
+            try:
+                with default_storage.open(blog.main_image.name) as file:
+                    digest = hash_file(file)
+            except OSError as error:
+                # A missing or unreadable file skips the blog, not the backfill.
+                skipped += 1
+                self.stderr.write(f"Blog {blog.pk}: cannot read {blog.main_image.name}: {error}")
+                continue
+            Blog.objects.filter(pk=blog.pk).update(main_image_hash=digest)
+            if digest not in pending:
+                pending[digest] = blog.main_image.name
+
+        rendered = 0
+        for (digest, name), result in self.render(pending):
+            try:
+                variants = result()
+            except Exception as error:
+                # The blogs keep empty variants, so a later run retries them.
+                skipped += 1
+                self.stderr.write(f"{name}: rendering variants failed: {error!r}")
+                continue
+            save_variants(digest, variants)
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {rendered} images."))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {skipped} images; see the errors above."))
+
+    def render(self, pending):
+        """Yield ``((digest, name), result)`` with ``result()`` returning the variants or raising."""
+        if not settings.BLOG_IMAGE_WORKERS:
+            for digest, name in pending.items():
+                yield (digest, name), partial(render_variants, *render_args(digest, name))
+            return
+        executor = get_executor()
+        futures = {
+            executor.submit(render_variants, *render_args(digest, name)): (digest, name)
+            for digest, name in pending.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result
@@ -0,0 +1,55 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog.importing import import_blog_batch
+
+
+class Command(BaseCommand):
+    help = "Stream blogs from an NDJSON file (one object per line, '-' for stdin) into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        started = time.perf_counter()
+        created = failed = 0
+        batch, offset = [], 0
+        try:
+            for line_number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError as error:
+                    raise CommandError(f"Line {line_number} is not valid JSON: {error}")
+                if len(batch) >= options['batch_size']:
+                    created, failed = self.flush(batch, offset, created, failed, started)
+                    offset += len(batch)
+                    batch = []
+            created, failed = self.flush(batch, offset, created, failed, started)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} blogs ({failed} rejected) in {elapsed:.1f}s, "
+            f"{created / elapsed if elapsed else 0:.0f} rows/s."
+        ))
+
+    def flush(self, batch, offset, created, failed, started):
+        if not batch:
+            return created, failed
+        batch_created, errors = import_blog_batch(batch, offset)
+        for error in errors:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        created += batch_created
+        failed += len(errors)
+        rate = created / (time.perf_counter() - started)
+        self.stdout.write(f"{created} imported, {failed} rejected, {rate:.0f} rows/s")
+        return created, failed
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.blog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt for {total} blogs."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from apps.blog.models import Blog, Comment
+
+
+class Command(BaseCommand):
+    help = "Recompute Blog.comment_count and Comment.reply_count from the comments table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        comment_counts = dict(
+            Comment.objects.order_by().values_list('blog_id').annotate(total=Count('id'))
+        )
+        reply_counts = dict(
+            Comment.objects.filter(parent_comment__isnull=False)
+            .order_by().values_list('parent_comment_id').annotate(total=Count('id'))
+        )
+        fixed_blogs = self.reconcile(Blog, 'comment_count', comment_counts, options['batch_size'])
+        fixed_comments = self.reconcile(Comment, 'reply_count', reply_counts, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed comment_count on {fixed_blogs} blogs and reply_count on {fixed_comments} comments."
+        ))
+
+    def reconcile(self, model, field, counts, batch_size):
+        stale = []
+        fixed = 0
+        for pk, stored in model.objects.order_by('pk').values_list('pk', field).iterator(chunk_size=batch_size):
+            actual = counts.get(pk, 0)
+            if stored != actual:
+                stale.append(model(pk=pk, **{field: actual}))
+            if len(stale) >= batch_size:
+                model.objects.bulk_update(stale, [field])
+                fixed += len(stale)
+                stale = []
+        model.objects.bulk_update(stale, [field])
+        return fixed + len(stale)
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.models import CustomUser
+from apps.blog.seeding import Seeder
+
+
+def start_date(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, categories, menus, tags, blogs and comments in bulk, reproducibly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--category-depth', type=int, default=4)
+        parser.add_argument('--menus', type=int, default=10)
+        parser.add_argument('--tags', type=int, default=1000)
+        parser.add_argument('--tags-per-blog', type=int, default=3)
+        parser.add_argument('--blogs', type=int, default=10000)
+        parser.add_argument('--commented-blogs', type=float, default=0.3, help="Share of blogs with comments.")
+        parser.add_argument('--comments-per-blog', type=int, default=3, help="Average root comments.")
+        parser.add_argument('--reply-ratio', type=float, default=0.4, help="Share of comments that get replies.")
+        parser.add_argument('--max-replies', type=int, default=3)
+        parser.add_argument('--reply-depth', type=int, default=5)
+        parser.add_argument('--start-date', type=start_date, default='2024-01-01',
+                            help="Blogs are spread over --days from this date.")
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--password', default='password', help="Password of every generated user.")
+        parser.add_argument('--staff-username', help="Make the first generated user staff with this username.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['blogs'] and not options['users'] and not CustomUser.objects.exists():
+            raise CommandError("Blogs need authors; pass --users or create a user first.")
+        started = time.perf_counter()
+        Seeder(
+            seed=options['seed'],
+            users=options['users'],
+            categories=options['categories'],
+            category_depth=options['category_depth'],
+            menus=options['menus'],
+            tags=options['tags'],
+            tags_per_blog=options['tags_per_blog'],
+            blogs=options['blogs'],
+            commented_blogs=options['commented_blogs'],
+            comments_per_blog=options['comments_per_blog'],
+            reply_ratio=options['reply_ratio'],
+            max_replies=options['max_replies'],
+            reply_depth=options['reply_depth'],
+            start_date=options['start_date'],
+            days=options['days'],
+            password=options['password'],
+            staff_username=options['staff_username'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        ).run()
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    Comment = apps.get_model('blog', 'Comment')
+    db_alias = schema_editor.connection.alias
+    comments = Comment.objects.using(db_alias).order_by().values('blog').filter(blog=OuterRef('pk'))
+    Blog.objects.using(db_alias).update(comment_count=Coalesce(
+        Subquery(comments.annotate(total=Count('id')).values('total')), 0
+    ))
+    replies = Comment.objects.using(db_alias).order_by().values('parent_comment').filter(parent_comment=OuterRef('pk'))
+    Comment.objects.using(db_alias).update(reply_count=Coalesce(
+        Subquery(replies.annotate(total=Count('id')).values('total')), 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_category_tree_range_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tag_blogs(apps, schema_editor):
+    Tag = apps.get_model('blog', 'Tag')
+    Through = apps.get_model('blog', 'Blog').tags.through
+    db_alias = schema_editor.connection.alias
+    links = (
+        Through.objects.using(db_alias).filter(tag_id=OuterRef('pk')).order_by()
+        .values('tag_id').annotate(total=Count('pk')).values('total')
+    )
+    Tag.objects.using(db_alias).update(blog_count=Coalesce(Subquery(links), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_blog_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='blog_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-blog_count', 'name'], name='tag_blog_count_idx'),
+        ),
+        migrations.RunPython(count_tag_blogs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:56
+
+import html
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'blog_blog_fts'
+BATCH_SIZE = 500
+
+# The index moves from the HTML description to the plain search_text column.
+CREATE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, search_text,
+        content='blog_blog', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, search_text) VALUES (new.id, new.title, new.search_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, search_text ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, title, search_text) VALUES (new.id, new.title, new.search_text);
+    END
+    """,
+]
+
+# The 0003 index over the HTML description.
+CREATE_HTML_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description,
+        content='blog_blog', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+DROP_FTS_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fill_search_text(apps, schema_editor):
+    # Same text as Blog.update_summary_fields().
+    Blog = apps.get_model('blog', 'Blog')
+    db_alias = schema_editor.connection.alias
+    blogs = Blog.objects.using(db_alias).only('id', 'description').order_by('id')
+    batch = []
+    for blog in blogs.iterator(chunk_size=BATCH_SIZE):
+        blog.search_text = html.unescape(' '.join(strip_tags(blog.description or '').split()))
+        batch.append(blog)
+        if len(batch) >= BATCH_SIZE:
+            Blog.objects.using(db_alias).bulk_update(batch, ['search_text'])
+            batch = []
+    Blog.objects.using(db_alias).bulk_update(batch, ['search_text'])
+
+
+def replace_fts(create_sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in DROP_FTS_SQL + create_sql:
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_tag_blog_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(replace_fts(CREATE_FTS_SQL), replace_fts(CREATE_HTML_FTS_SQL)),
+        migrations.CreateModel(
+            name='BlogSearchEntry',
+            fields=[
+                ('blog', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='blog.blog')),
+            ],
+            options={
+                'db_table': 'blog_blog_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,14 @@
-from django.db import models
+import html
+import math
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 from mptt.models import MPTTModel, TreeForeignKey
 
 from apps.authentication.models import CustomUser
+from .imaging import enqueue_variants, hash_file
 
 
 class Category(MPTTModel):
@@ -17,16 +24,38 @@ class Category(MPTTModel):
     class MPTTMeta:
         order_insertion_by = ['title']
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tree_id', 'lft', 'rght'], name='category_tree_range_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
 class Tag(models.Model):
     name = models.CharField(max_length=50)
+    blog_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-blog_count', 'name'], name='tag_blog_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def adjust_blog_counts(cls, deltas):
+        """Apply ``{tag id: change}`` to ``blog_count`` with a single UPDATE."""
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        cls.objects.filter(pk__in=deltas).update(blog_count=F('blog_count') + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+        ))
+
 
 class Blog(models.Model):
     title = models.CharField(max_length=255)
@@ -38,10 +67,81 @@ class Blog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
+    excerpt = models.TextField(blank=True, editable=False)
+    # The description as plain text; this is what the full-text index holds.
+    search_text = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    main_image_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    EXCERPT_WORDS = 40
+    WORDS_PER_MINUTE = 200
+    SUMMARY_FIELDS = ('excerpt', 'search_text', 'word_count', 'reading_time')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='blog_created_idx'),
+            # Django compiles ``active=True`` to a bare ``WHERE active``, which a plain
+            # (active, created_at) index can't serve, so each state gets a partial index.
+            models.Index(fields=['created_at'], condition=models.Q(active=True), name='blog_active_created_idx'),
+            models.Index(fields=['created_at'], condition=models.Q(active=False), name='blog_inactive_created_idx'),
+            models.Index(fields=['author', 'created_at'], name='blog_author_created_idx'),
+            models.Index(fields=['category', 'created_at'], name='blog_category_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.update_summary_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'description' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.SUMMARY_FIELDS}
+        new_image = bool(self.main_image) and not self.main_image._committed
+        if new_image:
+            self.dedupe_main_image()
+        super().save(*args, **kwargs)
+        if new_image and not self.image_variants:
+            name, digest = self.main_image.name, self.main_image_hash
+            transaction.on_commit(lambda: enqueue_variants(name, digest))
+
+    def dedupe_main_image(self):
+        """Reuse the stored file and variants of an identical, previously uploaded image."""
+        self.main_image_hash = hash_file(self.main_image)
+        self.image_variants = {}
+        existing = (
+            Blog.objects.filter(main_image_hash=self.main_image_hash)
+            .exclude(pk=self.pk)
+            .values('main_image', 'image_variants')
+            .first()
+        )
+        if existing:
+            self.main_image.name = existing['main_image']
+            self.main_image._committed = True
+            self.image_variants = existing['image_variants']
+
+    def update_summary_fields(self):
+        """Derive excerpt, search text, word count and reading time (minutes) from the HTML description."""
+        text = strip_tags(self.description or '')
+        words = text.split()
+        self.word_count = len(words)
+        self.reading_time = math.ceil(self.word_count / self.WORDS_PER_MINUTE)
+        self.excerpt = Truncator(' '.join(words)).words(self.EXCERPT_WORDS)
+        self.search_text = html.unescape(' '.join(words))
+
+
+class BlogSearchEntry(models.Model):
+    """A row of the FTS5 index over blog titles and search text, which migrations and triggers maintain."""
+    blog = models.OneToOneField(
+        Blog, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_entry'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'blog_blog_fts'
+
 
 class Menu(models.Model):
     title = models.CharField(max_length=255)
@@ -65,6 +165,8 @@ class Comment(models.Model):
     parent_comment = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     like = models.PositiveIntegerField(default=0)
     dislike = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'Comment by {self.author.username} on {self.blog.title}'
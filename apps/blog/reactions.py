@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .models import Comment
+
+REACTION_FIELDS = ('like', 'dislike')
+COUNTER_KEY = 'comment-reactions:{}:{}'
+SEQUENCE_KEY = 'comment-reactions:seq'
+DIRTY_KEY = 'comment-reactions:dirty:{}'
+FLUSHED_KEY = 'comment-reactions:flushed'
+STALLED_KEY = 'comment-reactions:stalled'
+
+
+def is_buffered():
+    return getattr(settings, 'COMMENT_REACTIONS_BUFFERED', False)
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def _mark_dirty(comment_id):
+    cache.set(DIRTY_KEY.format(_incr(SEQUENCE_KEY)), comment_id, timeout=None)
+
+
+def add_reaction(comment_id, field):
+    """
+    Count one like/dislike.
+
+    Unbuffered, this is a single ``UPDATE ... SET field = field + 1``. Buffered, the
+    increment goes to a cache counter and the comment is queued for the next
+    ``flush_reactions``; only the increment that moves a counter off zero queues it.
+    """
+    if not is_buffered():
+        Comment.objects.filter(pk=comment_id).update(**{field: F(field) + 1, 'updated_at': Now()})
+        return
+    if _incr(COUNTER_KEY.format(comment_id, field)) == 1:
+        _mark_dirty(comment_id)
+
+
+def pending_reactions(comment_id):
+    counters = cache.get_many([COUNTER_KEY.format(comment_id, field) for field in REACTION_FIELDS])
+    return {field: counters.get(COUNTER_KEY.format(comment_id, field), 0) for field in REACTION_FIELDS}
+
+
+def _collect_dirty(first, last):
+    """
+    Return the queued comment ids from ``first`` up to the last sequence number that can
+    be consumed, and that number.
+
+    A missing entry is usually a writer between taking its sequence number and storing
+    the id, so consumption stops there; an entry still missing on the next flush is
+    treated as lost and skipped.
+    """
+    found = cache.get_many([DIRTY_KEY.format(seq) for seq in range(first, last + 1)])
+    stalled = cache.get(STALLED_KEY)
+    comment_ids, consumed = set(), first - 1
+    for seq in range(first, last + 1):
+        key = DIRTY_KEY.format(seq)
+        if key in found:
+            comment_ids.add(found[key])
+        elif seq != stalled:
+            cache.set(STALLED_KEY, seq, timeout=None)
+            break
+        consumed = seq
+    return sorted(comment_ids), consumed
+
+
+def flush_reactions(batch_size=500):
+    """
+    Apply buffered increments with one batched UPDATE per field and chunk, and return
+    the number of comments touched. Run a single flusher at a time.
+
+    The flush is not idempotent: a chunk's UPDATE commits before its cache counters
+    are decremented, so a flusher that dies in between leaves those counts buffered
+    and the next flush applies them a second time.
+    """
+    last = cache.get(SEQUENCE_KEY, 0)
+    first = cache.get(FLUSHED_KEY, 0) + 1
+    if last < first:
+        return 0
+    comment_ids, consumed = _collect_dirty(first, last)
+
+    deltas = {}
+    for comment_id in comment_ids:
+        for field, count in pending_reactions(comment_id).items():
+            if count:
+                deltas.setdefault(field, {})[comment_id] = count
+
+    for field, counts in deltas.items():
+        items = list(counts.items())
+        for start in range(0, len(items), batch_size):
+            chunk = dict(items[start:start + batch_size])
+            increment = Case(
+                *[When(pk=comment_id, then=Value(count)) for comment_id, count in chunk.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            with transaction.atomic():
+                Comment.objects.filter(pk__in=chunk).update(**{field: F(field) + increment, 'updated_at': Now()})
+            for comment_id, count in chunk.items():
+                # Subtract what was applied; increments that raced the flush stay buffered.
+                if cache.decr(COUNTER_KEY.format(comment_id, field), count) > 0:
+                    _mark_dirty(comment_id)
+
+    cache.delete_many([DIRTY_KEY.format(seq) for seq in range(first, consumed + 1)])
+    cache.set(FLUSHED_KEY, consumed, timeout=None)
+    return len(comment_ids)
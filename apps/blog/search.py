@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection, connections, transaction
+from django.db.models import BooleanField, FloatField, TextField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = 'blog_blog_fts'
+
+# Same triggers as migration 0011. SQLite drops them whenever a migration rebuilds
+# blog_blog, so they are re-installed after every migrate.
+CREATE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, search_text) VALUES (new.id, new.title, new.search_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, search_text ON blog_blog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_text)
+        VALUES ('delete', old.id, old.title, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, title, search_text) VALUES (new.id, new.title, new.search_text);
+    END
+    """,
+]
+
+# Snippets are built around these control characters, so the indexed text can be
+# escaped before they are turned into <mark> tags.
+MARK_START, MARK_END = '\x02', '\x03'
+
+TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_fts_query(text):
+    """
+    Turn user input into a safe FTS5 MATCH expression.
+
+    ``"quoted words"`` stay phrases, a trailing ``*`` makes a prefix query and every
+    other word becomes a quoted term, so FTS5 operators in user input can't cause
+    syntax errors. Terms are AND-ed.
+    """
+    terms = []
+    for phrase, word in TERM_RE.findall(text):
+        if phrase.strip():
+            terms.append('"%s"' % phrase.strip())
+            continue
+        word = word.replace('"', '')
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            terms.append('"%s"%s' % (word, '*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def highlight_snippet(snippet):
+    """HTML-escape a plain-text snippet and wrap its matches in ``<mark>``."""
+    if snippet is None:
+        return None
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def install_search_triggers(sender=None, using='default', **kwargs):
+    """post_migrate handler that restores the index triggers if the FTS table exists."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Ranked full-text search over title and description with ``?q=``.
+
+    Matches come from the FTS5 index, ordered by bm25 rank, and carry
+    ``search_rank`` and a highlighted ``search_snippet`` of the description's text.
+    """
+    search_param = 'q'
+
+    def get_search_query(self, request):
+        return build_fts_query(request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+        # Joining the index through BlogSearchEntry keeps MATCH, bm25() and snippet()
+        # in the one query over the index, as FTS5 requires.
+        return queryset.filter(
+            RawSQL(f'{FTS_TABLE} MATCH %s', [query], output_field=BooleanField()),
+            search_entry__isnull=False,
+        ).annotate(
+            search_rank=RawSQL(f'bm25({FTS_TABLE}, 10.0, 1.0)', [], output_field=FloatField()),
+            search_snippet=RawSQL(
+                f"snippet({FTS_TABLE}, 1, %s, %s, '…', 24)", [MARK_START, MARK_END], output_field=TextField()
+            ),
+        ).order_by('search_rank', '-id')
+
+
+def rebuild_search_index():
+    """
+    Rebuild the index from ``blog_blog`` with FTS5's ``rebuild`` and return the row count.
+
+    The rebuild is one statement in one transaction: searches keep using the old index
+    until it commits, and blogs written meanwhile wait for it rather than being indexed twice.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute("SELECT COUNT(*) FROM blog_blog")
+        total = cursor.fetchone()[0]
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
@@ -0,0 +1,256 @@
+import io
+import math
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from apps.authentication.models import CustomUser, UserAvatar
+from .caching import invalidate_cache
+from .models import Blog, Category, Comment, Menu, Tag
+
+WORDS = (
+    'news report city market sport weather science travel music film health school '
+    'energy policy court budget river garden museum festival election launch study '
+    'season league record harbor forest coast bridge station council summit climate '
+    'review ticket profile feature series opinion archive interview transport housing'
+).split()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the given ``auto_now``/``auto_now_add`` values instead of ``now()``."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Seeder:
+    """
+    Generates users, a category forest, menus, tags, blogs and comment trees with
+    ``bulk_create``. Primary keys, MPTT fields, summary fields and counters are all
+    computed here, so nothing is saved row by row and no tree rebuild is needed.
+    The same seed on the same starting database gives the same rows.
+    """
+
+    def __init__(self, *, seed=0, users=100, categories=50, category_depth=4, menus=10, tags=1000,
+                 tags_per_blog=3, blogs=10000, commented_blogs=0.3, comments_per_blog=3, reply_ratio=0.4,
+                 max_replies=3, reply_depth=5, start_date, days=365, password='password',
+                 staff_username=None, batch_size=2000, stdout=None):
+        self.rng = random.Random(seed)
+        self.counts = {
+            'users': users, 'categories': categories, 'menus': menus, 'tags': tags, 'blogs': blogs,
+        }
+        self.category_depth = category_depth
+        self.tags_per_blog = tags_per_blog
+        self.commented_blogs = commented_blogs
+        self.comments_per_blog = comments_per_blog
+        self.reply_ratio = reply_ratio
+        self.max_replies = max_replies
+        self.reply_depth = reply_depth
+        self.start_date = start_date
+        self.seconds = days * 24 * 60 * 60
+        self.password = password
+        self.staff_username = staff_username
+        self.batch_size = batch_size
+        self.write = stdout.write if stdout else (lambda message: None)
+
+    def run(self):
+        with explicit_timestamps(Blog, Comment):
+            self.user_ids = self.seed_users()
+            self.category_ids = self.seed_categories()
+            self.seed_menus()
+            self.tag_ids = self.seed_tags()
+            self.seed_blogs()
+        with connection.cursor() as cursor:
+            # Explicit ids leave sequences behind on backends that have them.
+            for sql in connection.ops.sequence_reset_sql(no_style(), [CustomUser, Category, Tag, Blog, Comment]):
+                cursor.execute(sql)
+        # bulk_create sends no signals, so the cached responses are dropped here.
+        for namespace in ('tags', 'menus', 'categories'):
+            invalidate_cache(namespace)
+
+    def words(self, count):
+        return self.rng.choices(WORDS, k=count)
+
+    def timestamp(self):
+        return self.start_date + timedelta(seconds=self.rng.randrange(self.seconds))
+
+    def seed_users(self):
+        # One hash for everyone: hashing a password per fake user is what makes seeding slow.
+        password = make_password(self.password)
+        first_id = next_id(CustomUser)
+        users = [
+            CustomUser(
+                id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com', password=password,
+                is_active=True, date_joined=self.start_date,
+            )
+            for user_id in range(first_id, first_id + self.counts['users'])
+        ]
+        if self.staff_username and users and not CustomUser.objects.filter(username=self.staff_username).exists():
+            staff = users[0]
+            staff.username, staff.email = self.staff_username, f'{self.staff_username}@example.com'
+            staff.is_staff = staff.is_superuser = True
+        CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+        if users and users[0].is_staff:
+            avatar = UserAvatar(user_id=users[0].id)
+            with io.BytesIO() as buffer:
+                Image.new('RGB', (64, 64), 'teal').save(buffer, 'PNG')
+                avatar.set_image(buffer.getvalue())
+            avatar.save()
+        self.write(f'{len(users)} users')
+        return [user.id for user in users] or list(CustomUser.objects.values_list('id', flat=True))
+
+    def seed_categories(self):
+        first_id = next_id(Category)
+        first_tree = (Category.objects.aggregate(last=Max('tree_id'))['last'] or 0) + 1
+        nodes = []
+        children = {None: []}
+        for category_id in range(first_id, first_id + self.counts['categories']):
+            candidates = [node for node in nodes[-50:] if node.level < self.category_depth - 1]
+            parent = self.rng.choice(candidates) if candidates and self.rng.random() < 0.6 else None
+            node = Category(
+                id=category_id, title=f'{self.rng.choice(WORDS).title()} {category_id}',
+                parent_id=parent.id if parent else None, level=parent.level + 1 if parent else 0,
+            )
+            nodes.append(node)
+            children[node.id] = []
+            children[node.parent_id].append(node)
+
+        # Number each tree depth first, siblings in ``order_insertion_by`` (title) order,
+        # which is where MPTT itself would have put them.
+        roots = sorted(children[None], key=lambda node: node.title)
+        for tree_id, root in enumerate(roots, start=first_tree):
+            counter = 1
+            stack = [(root, False)]
+            while stack:
+                node, visited = stack.pop()
+                if visited:
+                    node.rght = counter
+                    counter += 1
+                    continue
+                node.tree_id, node.lft = tree_id, counter
+                counter += 1
+                stack.append((node, True))
+                siblings = sorted(children[node.id], key=lambda child: child.title, reverse=True)
+                stack.extend((child, False) for child in siblings)
+        Category.objects.bulk_create(nodes, batch_size=self.batch_size)
+        self.write(f'{len(nodes)} categories in {len(roots)} trees')
+        return [node.id for node in nodes] or list(Category.objects.values_list('id', flat=True))
+
+    def seed_menus(self):
+        Menu.objects.bulk_create([
+            Menu(
+                title=' '.join(self.words(2)).title(), seat_number=seat,
+                category_id=self.rng.choice(self.category_ids) if self.category_ids else None,
+            )
+            for seat in range(self.counts['menus'])
+        ])
+        self.write(f"{self.counts['menus']} menus")
+
+    def seed_tags(self):
+        first_id = next_id(Tag)
+        tags = [
+            Tag(id=tag_id, name=f'{self.rng.choice(WORDS)}-{tag_id}')
+            for tag_id in range(first_id, first_id + self.counts['tags'])
+        ]
+        Tag.objects.bulk_create(tags, batch_size=self.batch_size)
+        self.write(f'{len(tags)} tags')
+        return [tag.id for tag in tags] or list(Tag.objects.values_list('id', flat=True))
+
+    def build_blog(self, blog_id):
+        words = self.words(self.rng.randint(50, 800))
+        created_at = self.timestamp()
+        # The same summary Blog.update_summary_fields() derives, without parsing the HTML again.
+        excerpt = ' '.join(words[:Blog.EXCERPT_WORDS]) + ('…' if len(words) > Blog.EXCERPT_WORDS else '')
+        return Blog(
+            id=blog_id,
+            title=' '.join(self.words(self.rng.randint(3, 9))).capitalize(),
+            description='<p>' + ' '.join(words) + '</p>',
+            main_image='blogs/seed.png',
+            author_id=self.rng.choice(self.user_ids),
+            category_id=self.rng.choice(self.category_ids) if self.category_ids else None,
+            created_at=created_at,
+            updated_at=created_at,
+            active=self.rng.random() < 0.9,
+            excerpt=excerpt,
+            search_text=' '.join(words),
+            word_count=len(words),
+            reading_time=math.ceil(len(words) / Blog.WORDS_PER_MINUTE),
+        )
+
+    def build_comments(self, blog, next_comment_id):
+        """A comment tree for ``blog``, parents before replies, with reply and comment counts set."""
+        comments = []
+        level = [None] * self.rng.randint(1, max(1, 2 * self.comments_per_blog - 1))
+        for depth in range(self.reply_depth + 1):
+            replies = []
+            for parent in level:
+                comment = Comment(
+                    id=next_comment_id + len(comments), blog_id=blog.id, author_id=self.rng.choice(self.user_ids),
+                    content=' '.join(self.words(self.rng.randint(5, 60))).capitalize(),
+                    parent_comment_id=parent.id if parent else None,
+                    like=self.rng.randint(0, 20), dislike=self.rng.randint(0, 5),
+                    updated_at=blog.created_at + timedelta(minutes=len(comments) + 1),
+                )
+                comments.append(comment)
+                if parent:
+                    parent.reply_count += 1
+                if depth < self.reply_depth and self.rng.random() < self.reply_ratio:
+                    replies.extend([comment] * self.rng.randint(1, self.max_replies))
+            level = replies
+        blog.comment_count = len(comments)
+        return comments
+
+    def seed_blogs(self):
+        next_blog_id = next_id(Blog)
+        next_comment_id = next_id(Comment)
+        cumulative = []
+        total = 0
+        # Tag popularity falls off with rank, so a few tags are on most blogs.
+        for rank in range(len(self.tag_ids)):
+            total += 1 / (rank + 1)
+            cumulative.append(total)
+
+        created = comments_created = 0
+        while created < self.counts['blogs']:
+            size = min(self.batch_size, self.counts['blogs'] - created)
+            blogs = [self.build_blog(next_blog_id + i) for i in range(size)]
+            comments = []
+            for blog in blogs:
+                if self.rng.random() < self.commented_blogs:
+                    comments.extend(self.build_comments(blog, next_comment_id + len(comments)))
+            taggings = [
+                Blog.tags.through(blog_id=blog.id, tag_id=tag_id)
+                for blog in blogs
+                for tag_id in sorted(set(self.rng.choices(self.tag_ids, cum_weights=cumulative, k=self.tags_per_blog)))
+            ] if self.tag_ids else []
+            with transaction.atomic():
+                Blog.objects.bulk_create(blogs, batch_size=self.batch_size)
+                Blog.tags.through.objects.bulk_create(taggings, batch_size=self.batch_size)
+                Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+                Tag.adjust_blog_counts(Counter(tagging.tag_id for tagging in taggings))
+            next_blog_id += size
+            next_comment_id += len(comments)
+            created += size
+            comments_created += len(comments)
+            self.write(f'{created} blogs, {comments_created} comments')
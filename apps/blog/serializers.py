@@ -1,11 +1,54 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import Blog, Comment, Tag, Menu, Category
+from .search import highlight_snippet
 
 
-class BlogSerializer(serializers.ModelSerializer):
+class BlogImageSerializer(serializers.ModelSerializer):
+    main_image_srcset = serializers.SerializerMethodField()
+
+    def get_main_image_srcset(self, obj):
+        """Map of variant width to URL, empty until the variants have been generated."""
+        request = self.context.get('request')
+        srcset = {}
+        for width, name in obj.image_variants.items():
+            url = default_storage.url(name)
+            srcset[width] = request.build_absolute_uri(url) if request else url
+        return srcset
+
+
+class BlogSerializer(BlogImageSerializer):
     class Meta:
         model = Blog
-        fields = '__all__'
+        exclude = ['search_text', 'main_image_hash', 'image_variants']
+
+
+class BlogListSerializer(BlogImageSerializer):
+    class Meta:
+        model = Blog
+        exclude = ['description', 'search_text', 'main_image_hash', 'image_variants']
+
+
+class BlogSearchSerializer(BlogListSerializer):
+    search_rank = serializers.FloatField(read_only=True)
+    search_snippet = serializers.SerializerMethodField()
+
+    def get_search_snippet(self, obj):
+        return highlight_snippet(obj.search_snippet)
+
+
+class BlogImportSerializer(serializers.Serializer):
+    """
+    One blog of a bulk import. Relations are plain ids and tags are names, so a whole
+    batch can be checked and resolved with one query per relation.
+    """
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    main_image = serializers.CharField(max_length=100)
+    author = serializers.IntegerField()
+    category = serializers.IntegerField(required=False, allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False, default=list)
+    active = serializers.BooleanField(required=False, default=True)
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -13,9 +56,15 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ['id', 'blog', 'author', 'content', 'parent_comment', 'like', 'dislike', 'replies']
+        fields = [
+            'id', 'blog', 'author', 'content', 'parent_comment', 'like', 'dislike', 'reply_count', 'replies'
+        ]
+        read_only_fields = ['like', 'dislike']
 
     def get_replies(self, obj):
+        replies_map = self.context.get('replies_map')
+        if replies_map is not None:
+            return CommentSerializer(replies_map.get(obj.id, []), many=True, context=self.context).data
         if obj.replies.exists():
             return CommentSerializer(obj.replies.all(), many=True).data
         return []
@@ -0,0 +1,78 @@
+from django.db.models import Count, F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from .caching import invalidate_cache
+from .models import Blog, Comment, Tag, Menu, Category
+
+# Cached viewset namespaces whose responses include data of each model.
+CACHE_DEPENDENCIES = {
+    Tag: ['tags'],
+    Menu: ['menus'],
+    # Deleting a category nulls Menu.category without Menu signals.
+    Category: ['categories', 'menus'],
+}
+
+
+@receiver([post_save, post_delete, node_moved])
+def invalidate_cached_responses(sender, **kwargs):
+    for namespace in CACHE_DEPENDENCIES.get(sender, []):
+        invalidate_cache(namespace)
+
+
+def linked_tag_counts(instance, reverse, pk_set=None):
+    """``{tag id: links}`` among the existing blog-tag links of ``instance`` (limited to ``pk_set``)."""
+    links = Blog.tags.through.objects.order_by()
+    if reverse:
+        links = links.filter(tag_id=instance.pk)
+        if pk_set is not None:
+            links = links.filter(blog_id__in=pk_set)
+    else:
+        links = links.filter(blog_id=instance.pk)
+        if pk_set is not None:
+            links = links.filter(tag_id__in=pk_set)
+    return dict(links.values_list('tag_id').annotate(total=Count('pk')))
+
+
+@receiver(m2m_changed, sender=Blog.tags.through)
+def update_tag_blog_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        # remove() reports the requested ids, not the removed ones, so count the links first.
+        instance._unlinked_tag_counts = linked_tag_counts(instance, reverse, pk_set)
+        return
+    if action == 'post_add':
+        # add() reports only the links it actually created.
+        deltas = {instance.pk: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1)
+    elif action in ('post_remove', 'post_clear'):
+        deltas = {pk: -total for pk, total in instance.__dict__.pop('_unlinked_tag_counts', {}).items()}
+    else:
+        return
+    Tag.adjust_blog_counts(deltas)
+    invalidate_cache('tags')
+
+
+@receiver(pre_delete, sender=Blog)
+def release_tag_blog_counts(sender, instance, **kwargs):
+    # The cascade deletes the blog's links without m2m_changed.
+    deltas = {pk: -total for pk, total in linked_tag_counts(instance, reverse=False).items()}
+    if deltas:
+        Tag.adjust_blog_counts(deltas)
+        invalidate_cache('tags')
+
+
+def update_comment_counts(comment, delta):
+    Blog.objects.filter(pk=comment.blog_id).update(comment_count=F('comment_count') + delta)
+    if comment.parent_comment_id is not None:
+        Comment.objects.filter(pk=comment.parent_comment_id).update(reply_count=F('reply_count') + delta)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_counts(sender, instance, created, **kwargs):
+    if created:
+        update_comment_counts(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_counts(sender, instance, **kwargs):
+    update_comment_counts(instance, -1)
@@ -0,0 +1,941 @@
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Count, F
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.authentication.models import CustomUser
+from apps.routers import PIN_COOKIE, REPLICA_DB_ALIAS, use_primary
+from .caching import get_cache_version
+from .exporting import BLOG_EXPORT_FIELDS, COMMENT_EXPORT_FIELDS
+from .importing import import_blog_batch
+from .models import Blog, Category, Comment, Menu, Tag
+from .reactions import flush_reactions, pending_reactions
+from .search import FTS_TABLE
+
+# Tests must not need a Redis server.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_blogs(author, count, tags=(), **fields):
+    blogs = []
+    for i in range(count):
+        blog = Blog.objects.create(
+            title=f'Blog {i}', description=f'<p>Body of blog {i}</p>', main_image='blogs/test.png',
+            author=author, **fields,
+        )
+        blog.tags.set(tags)
+        blogs.append(blog)
+    return blogs
+
+
+def copy_database(source, target):
+    """Copy the SQLite database at ``source`` over the one at ``target``."""
+    with closing(sqlite3.connect(source)) as source_db, closing(sqlite3.connect(target)) as target_db:
+        source_db.backup(target_db)
+
+
+def create_thread(blog, author, roots=3, replies=2):
+    """``roots`` root comments on ``blog``, each with ``replies`` replies that have one reply each."""
+    for i in range(roots):
+        root = Comment.objects.create(blog=blog, author=author, content=f'Root {i}')
+        for j in range(replies):
+            reply = Comment.objects.create(blog=blog, author=author, content=f'Reply {j}', parent_comment=root)
+            Comment.objects.create(blog=blog, author=author, content='Nested', parent_comment=reply)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryBudgetTests(TestCase):
+    """
+    The blog and comment read endpoints run a fixed number of queries whatever
+    the page size, so a serializer or queryset change that brings back an N+1 fails here.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        category = Category.objects.create(title='News')
+        tags = [Tag.objects.create(name=f'tag-{i}') for i in range(3)]
+        cls.blogs = create_blogs(cls.author, 30, tags=tags, category=category)
+        create_thread(cls.blogs[0], cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_blog_list(self):
+        # Validators aggregate, page count, page, tags.
+        for page_size in (5, 30):
+            with self.assertNumQueries(4) as queries:
+                response = self.client.get(reverse('blog-list'), {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+        # Author and category are serialized as ids; joining the user table would only add its password hash.
+        self.assertFalse(any('JOIN' in query['sql'] for query in queries.captured_queries[:3]))
+
+    def test_blog_list_cursor(self):
+        # Validators aggregate, page, tags.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('blog-list'), {'pagination': 'cursor', 'page_size': 30})
+        self.assertEqual(len(response.data['results']), 30)
+
+    def test_blog_detail(self):
+        # Blog, tags.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog-detail', args=[self.blogs[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['tags']), 3)
+
+    def test_comment_thread(self):
+        # The ?blog= filter's blog lookup, validators aggregate, the whole thread.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('comment-list'), {'blog': self.blogs[0].pk})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results'][0]['replies'][0]['replies']), 1)
+
+    def test_comment_detail(self):
+        # Comment, the thread's reply ids for the validators, replies.
+        root = Comment.objects.filter(blog=self.blogs[0], parent_comment=None).first()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('comment-detail', args=[root.pk]))
+        self.assertEqual(len(response.data['replies']), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommentConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        blog = create_blogs(author, 1)[0]
+        cls.root = Comment.objects.create(blog=blog, author=author, content='Root')
+        cls.reply = Comment.objects.create(blog=blog, author=author, content='Reply', parent_comment=cls.root)
+        cls.other = Comment.objects.create(blog=blog, author=author, content='Other root')
+        cls.other_reply = Comment.objects.create(blog=blog, author=author, content='Other', parent_comment=cls.other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('comment-detail', args=[self.root.pk])
+        self.etag = self.client.get(self.url)['ETag']
+
+    def assertStale(self):
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+
+    def test_unchanged(self):
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_edited_comment(self):
+        self.root.content = 'Edited root'
+        self.root.save()
+        self.assertStale()
+
+    def test_edited_reply(self):
+        self.reply.content = 'Edited reply'
+        self.reply.save()
+        self.assertStale()
+
+    def test_new_nested_reply(self):
+        Comment.objects.create(blog=self.root.blog, author=self.root.author, content='New', parent_comment=self.reply)
+        self.assertStale()
+
+    def test_other_thread_does_not_change_validators(self):
+        self.other_reply.content = 'Edited elsewhere'
+        self.other_reply.save()
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.blog = Blog.objects.create(
+            title='Harbor news', main_image='blogs/test.png', author=author,
+            description='<p><strong>City</strong> market &amp; <a href="/x">harbor</a> &lt;opens&gt;</p>',
+        )
+
+    def search(self, query):
+        return APIClient().get(reverse('blog-list'), {'q': query}).data
+
+    def test_markup_is_not_indexed(self):
+        for query in ('p', 'strong', 'href', 'amp'):
+            self.assertEqual(self.search(query)['count'], 0, query)
+
+    def test_snippet_is_escaped_text(self):
+        results = self.search('harbor')['results']
+        self.assertEqual([blog['id'] for blog in results], [self.blog.pk])
+        self.assertEqual(results[0]['search_snippet'], 'City market &amp; <mark>harbor</mark> &lt;opens&gt;')
+
+    def test_index_follows_edits(self):
+        self.blog.description = '<p>Closed for winter</p>'
+        self.blog.save()
+        self.assertEqual(self.search('harbor')['count'], 1)  # Still in the title.
+        self.assertEqual(self.search('market')['count'], 0)
+        self.assertEqual(self.search('winter')['count'], 1)
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(self.search('harbor')['count'], 0)
+        output = StringIO()
+        call_command('rebuild_search_index', stdout=output)
+        self.assertIn('Search index rebuilt for 1 blogs.', output.getvalue())
+        self.assertEqual(self.search('harbor')['count'], 1)
+        # Raises if the index disagrees with blog_blog, e.g. a row indexed twice.
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def row(self, title, **fields):
+        return {
+            'title': title, 'description': '<p>Imported</p>', 'main_image': 'blogs/test.png',
+            'author': self.author.pk, 'tags': ['imported'], **fields,
+        }
+
+    def bulk(self, rows):
+        return self.client.post(reverse('blog-bulk'), rows, format='json')
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.bulk([self.row('Mine')]).status_code, 403)
+        self.assertFalse(Blog.objects.exists())
+
+    def test_all_rows_created(self):
+        response = self.bulk([self.row('One'), self.row('Two')])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 2, 'errors': []})
+        self.assertEqual(Tag.objects.get(name='imported').blogs.count(), 2)
+
+    def test_some_rows_rejected(self):
+        response = self.bulk([self.row('One'), self.row('Ghost', author=0)])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1])
+
+    def test_no_rows_created(self):
+        response = self.bulk([self.row(''), self.row('Ghost', author=0)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual([error['row'] for error in response.data['errors']], [0, 1])
+        self.assertFalse(Blog.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    The primary and the replica are separate SQLite files, and the replica only
+    sees the primary's writes when ``replicate()`` copies them over, like a lagging replica.
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.paths = {
+            DEFAULT_DB_ALIAS: os.path.join(directory, 'primary.sqlite3'),
+            REPLICA_DB_ALIAS: os.path.join(directory, 'replica.sqlite3'),
+        }
+        for alias, path in cls.paths.items():
+            original = connections[alias]
+            connections[alias] = type(original)({**original.settings_dict, 'NAME': path}, alias)
+            cls.addClassCleanup(cls.restore_connection, alias, original)
+        # The content type cache is per alias, and would now hold this primary's ids.
+        cls.addClassCleanup(ContentType.objects.clear_cache)
+
+        call_command('migrate', database=DEFAULT_DB_ALIAS, verbosity=0)
+        cls.migrated = os.path.join(directory, 'migrated.sqlite3')
+        copy_database(cls.paths[DEFAULT_DB_ALIAS], cls.migrated)
+
+    @classmethod
+    def restore_connection(cls, alias, original):
+        connections[alias].close()
+        connections[alias] = original
+
+    def setUp(self):
+        connections[DEFAULT_DB_ALIAS].close()
+        copy_database(self.migrated, self.paths[DEFAULT_DB_ALIAS])
+        self.author = CustomUser.objects.create_user('author', 'author@example.com', 'password', is_active=True)
+        self.blog = create_blogs(self.author, 1)[0]
+        self.replicate()
+
+    def replicate(self):
+        connections[REPLICA_DB_ALIAS].close()
+        copy_database(self.paths[DEFAULT_DB_ALIAS], self.paths[REPLICA_DB_ALIAS])
+
+    def test_reads_use_the_replica(self):
+        blog = create_blogs(self.author, 1)[0]
+        self.assertEqual(blog._state.db, DEFAULT_DB_ALIAS)
+        self.assertFalse(Blog.objects.filter(pk=blog.pk).exists())
+        with use_primary():
+            self.assertTrue(Blog.objects.filter(pk=blog.pk).exists())
+        with transaction.atomic():
+            self.assertTrue(Blog.objects.filter(pk=blog.pk).exists())
+        # Related objects are read from where the instance came from.
+        self.assertEqual(blog.comments.all().db, DEFAULT_DB_ALIAS)
+
+        self.replicate()
+        self.assertTrue(Blog.objects.filter(pk=blog.pk).exists())
+
+    def test_client_reads_its_own_writes(self):
+        url = reverse('comment-list')
+        writer = APIClient()
+        writer.force_authenticate(self.author)
+        response = writer.post(url, {'blog': self.blog.pk, 'author': self.author.pk, 'content': 'First'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writer.cookies[PIN_COOKIE]['max-age'], 5)
+
+        # The writer is pinned to the primary; everyone else reads the stale replica.
+        self.assertEqual(writer.get(url, {'blog': self.blog.pk}).data['count'], 1)
+        self.assertEqual(APIClient().get(url, {'blog': self.blog.pk}).data['count'], 0)
+
+        self.replicate()
+        self.assertEqual(APIClient().get(url, {'blog': self.blog.pk}).data['count'], 1)
+
+    def test_failed_write_does_not_pin(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post(reverse('comment-list'), {'blog': self.blog.pk, 'author': self.author.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(PIN_COOKIE, client.cookies)
+
+
+class QueryPlanTests(TestCase):
+    def test_blog_filters_use_indexes(self):
+        output = StringIO()
+        try:
+            call_command('check_blog_query_plans', stdout=output)
+        except CommandError:
+            self.fail(output.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BLOG_IMAGE_WORKERS=0)
+class ImageVariantBackfillTests(TestCase):
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(MEDIA_ROOT=media_root))
+
+    def test_unreadable_images_are_skipped(self):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        png = BytesIO()
+        Image.new('RGB', (700, 400), 'teal').save(png, 'PNG')
+        names = [
+            'blogs/missing.png',
+            default_storage.save('blogs/corrupt.png', ContentFile(b'not an image')),
+            default_storage.save('blogs/good.png', ContentFile(png.getvalue())),
+        ]
+        # bulk_create, so the blogs are saved without rendering anything yet.
+        Blog.objects.bulk_create([
+            Blog(title=name, description='<p>x</p>', main_image=name, author=author) for name in names
+        ])
+        errors = StringIO()
+        call_command('generate_image_variants', stdout=StringIO(), stderr=errors)
+        variants = dict(Blog.objects.values_list('main_image', 'image_variants'))
+        self.assertEqual(variants['blogs/missing.png'], {})
+        self.assertEqual(variants['blogs/corrupt.png'], {})
+        self.assertEqual(sorted(variants['blogs/good.png']), ['320', '640'])
+        self.assertIn('missing.png', errors.getvalue())
+        self.assertIn('corrupt.png', errors.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        cls.news = Category.objects.create(title='News')
+        cls.sport = Category.objects.create(title='Sport')
+        cls.menu = Menu.objects.create(title='Home', seat_number=1, category=cls.news)
+        cls.tag = Tag.objects.create(name='python')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def versions(self):
+        return {namespace: get_cache_version(namespace) for namespace in ('tags', 'menus', 'categories')}
+
+    def assertInvalidates(self, namespaces, change):
+        before = self.versions()
+        with self.captureOnCommitCallbacks() as callbacks:
+            change()
+        # Until the transaction commits, readers keep the old version.
+        self.assertEqual(self.versions(), before)
+        for callback in callbacks:
+            callback()
+        after = self.versions()
+        self.assertEqual({namespace for namespace in after if after[namespace] != before[namespace]}, set(namespaces))
+
+    def test_hit_needs_no_query(self):
+        urls = [
+            reverse('tag-list'), reverse('tag-detail', args=[self.tag.pk]), reverse('tag-cloud'),
+            reverse('menu-list'), reverse('category-list'), reverse('category-tree'),
+        ]
+        for url in urls:
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).data, first.data)
+
+    def test_stale_response_is_replaced_after_commit(self):
+        url = reverse('tag-list')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='django')
+        self.assertEqual([tag['name'] for tag in self.client.get(url).data], ['python', 'django'])
+
+    def test_tag_changes(self):
+        self.tag.name = 'python3'
+        self.assertInvalidates(['tags'], self.tag.save)
+        self.assertInvalidates(['tags'], self.tag.delete)
+
+    def test_menu_changes(self):
+        self.menu.seat_number = 2
+        self.assertInvalidates(['menus'], self.menu.save)
+        self.assertInvalidates(['menus'], self.menu.delete)
+
+    def test_category_changes_invalidate_menus_too(self):
+        self.news.title = 'World'
+        self.assertInvalidates(['categories', 'menus'], self.news.save)
+        self.assertInvalidates(['categories', 'menus'], self.news.delete)
+
+    def test_category_move(self):
+        self.sport.refresh_from_db()
+        self.assertInvalidates(['categories', 'menus'], lambda: self.sport.move_to(Category.objects.get(title='News')))
+
+    def test_cache_stats(self):
+        url = reverse('tag-list')
+        for _ in range(3):
+            self.client.get(url)
+        stats_url = reverse('tag-cache-stats')
+        self.assertEqual(self.client.get(stats_url).status_code, 401)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get(stats_url).data, {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        blog = create_blogs(cls.author, 1)[0]
+        cls.comments = [Comment.objects.create(blog=blog, author=cls.author, content=f'Comment {i}') for i in range(2)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def react(self, comment, field='like'):
+        return self.client.post(reverse(f'comment-{field}', args=[comment.pk]))
+
+    def counts(self, comment):
+        comment.refresh_from_db()
+        return {'like': comment.like, 'dislike': comment.dislike}
+
+    def test_anonymous(self):
+        response = APIClient().post(reverse('comment-like', args=[self.comments[0].pk]))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.counts(self.comments[0]), {'like': 0, 'dislike': 0})
+
+    def test_unbuffered(self):
+        comment = self.comments[0]
+        response = self.react(comment)
+        self.assertEqual((response.status_code, response.data), (200, {'like': 1, 'dislike': 0}))
+        # Another writer's increment lands between this process reading and reacting.
+        Comment.objects.filter(pk=comment.pk).update(like=F('like') + 5)
+        response = self.react(comment)
+        self.assertEqual(response.data, {'like': 7, 'dislike': 0})
+        self.assertEqual(self.react(comment, 'dislike').data, {'like': 7, 'dislike': 1})
+
+    @override_settings(COMMENT_REACTIONS_BUFFERED=True)
+    def test_buffered_then_flushed(self):
+        first, second = self.comments
+        for _ in range(3):
+            response = self.react(first)
+        self.assertEqual((response.status_code, response.data), (202, {'like': 3, 'dislike': 0}))
+        self.react(first, 'dislike')
+        self.react(second)
+        self.assertEqual(self.counts(first), {'like': 0, 'dislike': 0})
+
+        self.assertEqual(flush_reactions(), 2)
+        self.assertEqual(self.counts(first), {'like': 3, 'dislike': 1})
+        self.assertEqual(self.counts(second), {'like': 1, 'dislike': 0})
+        self.assertEqual(pending_reactions(first.pk), {'like': 0, 'dislike': 0})
+        self.assertEqual(flush_reactions(), 0)
+
+        # Reactions after a flush are buffered again from zero.
+        self.assertEqual(self.react(first).data, {'like': 4, 'dislike': 1})
+        output = StringIO()
+        call_command('flush_comment_reactions', stdout=output)
+        self.assertIn('Flushed reactions for 1 comments.', output.getvalue())
+        self.assertEqual(self.counts(first), {'like': 4, 'dislike': 1})
+
+    @override_settings(COMMENT_REACTIONS_BUFFERED=True)
+    def test_flush_in_batches(self):
+        for comment in self.comments:
+            self.react(comment)
+        self.assertEqual(flush_reactions(batch_size=1), 2)
+        self.assertEqual([self.counts(comment)['like'] for comment in self.comments], [1, 1])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.a, cls.b, cls.c = [Tag.objects.create(name=name) for name in 'abc']
+        cls.blogs = [
+            create_blogs(cls.author, 1, tags=tags)[0]
+            for tags in ([cls.a], [cls.a, cls.b], [cls.b, cls.c], [])
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def filtered(self, **params):
+        response = APIClient().get(reverse('blog-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(blog['id'] for blog in response.data['results'])
+
+    def assertCounts(self, expected):
+        self.assertEqual(dict(Tag.objects.values_list('name', 'blog_count')), expected)
+        # The stored counts agree with the links.
+        self.assertEqual(
+            dict(Tag.objects.annotate(links=Count('blogs')).values_list('name', 'links')), expected
+        )
+
+    def test_any(self):
+        b1, b2, b3, _ = self.blogs
+        self.assertEqual(self.filtered(tags=[self.a.pk, self.b.pk]), [b1.pk, b2.pk, b3.pk])
+        self.assertEqual(self.filtered(tags=[self.c.pk]), [b3.pk])
+
+    def test_all(self):
+        b1, b2, b3, _ = self.blogs
+        self.assertEqual(self.filtered(tags=[self.a.pk, self.b.pk], tags_match='all'), [b2.pk])
+        self.assertEqual(self.filtered(tags=[self.a.pk, self.c.pk], tags_match='all'), [])
+        self.assertEqual(self.filtered(tags=[self.a.pk], tags_match='all'), [b1.pk, b2.pk])
+
+    def test_unknown_tag(self):
+        self.assertEqual(APIClient().get(reverse('blog-list'), {'tags': 0}).status_code, 400)
+
+    def test_counts_follow_blog_links(self):
+        self.assertCounts({'a': 2, 'b': 2, 'c': 1})
+        blog = self.blogs[3]
+        blog.tags.add(self.a, self.c)
+        blog.tags.add(self.a)  # Already linked.
+        self.assertCounts({'a': 3, 'b': 2, 'c': 2})
+        blog.tags.remove(self.a, self.b)  # Only a is linked.
+        self.assertCounts({'a': 2, 'b': 2, 'c': 2})
+        blog.tags.set([self.b])
+        self.assertCounts({'a': 2, 'b': 3, 'c': 1})
+        blog.tags.clear()
+        self.assertCounts({'a': 2, 'b': 2, 'c': 1})
+
+    def test_counts_follow_tag_links(self):
+        self.c.blogs.add(self.blogs[0], self.blogs[2])
+        self.assertCounts({'a': 2, 'b': 2, 'c': 2})
+        self.a.blogs.remove(self.blogs[1])
+        self.assertCounts({'a': 1, 'b': 2, 'c': 2})
+        self.b.blogs.clear()
+        self.assertCounts({'a': 1, 'b': 0, 'c': 2})
+
+    def test_deleting_a_blog(self):
+        self.blogs[1].delete()
+        self.assertCounts({'a': 1, 'b': 1, 'c': 1})
+
+    def test_bulk_import(self):
+        row = {'description': '<p>x</p>', 'main_image': 'blogs/test.png', 'author': self.author.pk}
+        created, errors = import_blog_batch([
+            {**row, 'title': 'One', 'tags': ['a', 'new']},
+            {**row, 'title': 'Two', 'tags': ['new']},
+        ])
+        self.assertEqual((created, errors), (2, []))
+        self.assertCounts({'a': 3, 'b': 2, 'c': 1, 'new': 2})
+
+    def test_adjust_blog_counts(self):
+        with self.assertNumQueries(1):
+            Tag.adjust_blog_counts({self.a.pk: 2, self.b.pk: -1, self.c.pk: 0})
+        self.assertEqual(dict(Tag.objects.values_list('name', 'blog_count')), {'a': 4, 'b': 1, 'c': 1})
+        with self.assertNumQueries(0):
+            Tag.adjust_blog_counts({self.a.pk: 0})
+
+    def test_cloud(self):
+        Tag.objects.create(name='unused')
+        self.blogs[3].tags.add(self.a)
+        response = APIClient().get(reverse('tag-cloud'))
+        self.assertEqual(
+            [(tag['name'], tag['blog_count'], tag['weight']) for tag in response.data],
+            [('a', 3, 5), ('b', 2, 4), ('c', 1, 1)],
+        )
+        self.assertEqual([tag['name'] for tag in APIClient().get(reverse('tag-cloud'), {'limit': 1}).data], ['a'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommentCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.blog, cls.other_blog = create_blogs(cls.author, 2)
+
+    def comment(self, parent=None, blog=None):
+        return Comment.objects.create(
+            blog=blog or self.blog, author=self.author, content='Comment', parent_comment=parent
+        )
+
+    def comment_count(self, blog=None):
+        return Blog.objects.get(pk=(blog or self.blog).pk).comment_count
+
+    def reply_count(self, comment):
+        return Comment.objects.get(pk=comment.pk).reply_count
+
+    def test_create_and_reply(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.comment(parent=reply)
+        self.comment(parent=root)
+        self.assertEqual(self.comment_count(), 4)
+        self.assertEqual((self.reply_count(root), self.reply_count(reply)), (2, 1))
+        self.assertEqual(self.comment_count(self.other_blog), 0)
+
+    def test_create_through_the_api(self):
+        root = self.comment()
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post(reverse('comment-list'), {
+            'blog': self.blog.pk, 'author': self.author.pk, 'content': 'Reply', 'parent_comment': root.pk,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((self.comment_count(), self.reply_count(root)), (2, 1))
+
+    def test_delete_reply(self):
+        root = self.comment()
+        self.comment(parent=root).delete()
+        self.assertEqual((self.comment_count(), self.reply_count(root)), (1, 0))
+
+    def test_delete_parent_with_replies(self):
+        root = self.comment()
+        self.comment(parent=self.comment(parent=root))
+        self.comment(parent=root)
+        kept = self.comment()
+        root.delete()
+        self.assertEqual(self.comment_count(), 1)
+        self.assertEqual(self.reply_count(kept), 0)
+
+    def test_reconcile(self):
+        root = self.comment()
+        self.comment(parent=root)
+        Blog.objects.filter(pk=self.blog.pk).update(comment_count=7)
+        Blog.objects.filter(pk=self.other_blog.pk).update(comment_count=3)
+        Comment.objects.filter(pk=root.pk).update(reply_count=0)
+        output = StringIO()
+        call_command('reconcile_comment_counts', batch_size=1, stdout=output)
+        self.assertIn('Fixed comment_count on 2 blogs and reply_count on 1 comments.', output.getvalue())
+        self.assertEqual((self.comment_count(), self.comment_count(self.other_blog)), (2, 0))
+        self.assertEqual(self.reply_count(root), 1)
+        output = StringIO()
+        call_command('reconcile_comment_counts', stdout=output)
+        self.assertIn('Fixed comment_count on 0 blogs and reply_count on 0 comments.', output.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncViewTests(TransactionTestCase):
+    """
+    Outside a transaction the blog reads go through the router to the replica,
+    which mirrors the primary under the test runner.
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def setUp(self):
+        cache.clear()
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        news = Category.objects.create(title='News')
+        Category.objects.create(title='Local', parent=news)
+        Menu.objects.create(title='Home', seat_number=1, category=news)
+        self.tag = Tag.objects.create(name='python')
+        self.blogs = create_blogs(author, 12, tags=[self.tag], category=news)
+        create_thread(self.blogs[0], author)
+
+    def get(self, name, args=(), params=None, **kwargs):
+        return async_to_sync(AsyncClient().get)(reverse(name, args=args), params or {}, **kwargs)
+
+    def test_blog_list(self):
+        with CaptureQueriesContext(connections[REPLICA_DB_ALIAS]) as replica_queries:
+            response = self.get('async-blog-list', params={'page_size': 5, 'page': 2})
+        # Validators aggregate, count, page, tags.
+        self.assertEqual(len(replica_queries), 4)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['count'], len(data['results'])), (12, 5))
+        self.assertNotIn('description', data['results'][0])
+        self.assertTrue(data['next'].endswith('/async/blogs/?page=3&page_size=5'))
+
+    def test_blog_list_filters(self):
+        response = self.get('async-blog-list', params={'tags': self.tag.pk, 'tags_match': 'all'})
+        self.assertEqual(response.json()['count'], 12)
+        response = self.get('async-blog-list', params={'tags': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.json())
+
+    def test_invalid_page(self):
+        for page in ('0', '3', 'last'):
+            self.assertEqual(self.get('async-blog-list', params={'page': page}).status_code, 404, page)
+        response = self.get('async-comment-thread', params={'blog': self.blogs[0].pk, 'page': 2})
+        self.assertEqual(response.status_code, 404)
+
+    def test_blog_detail(self):
+        response = self.get('async-blog-detail', [self.blogs[0].pk])
+        self.assertEqual(response.json()['description'], '<p>Body of blog 0</p>')
+        self.assertEqual(self.get('async-blog-detail', [0]).status_code, 404)
+
+    def test_conditional_get(self):
+        etag = self.get('async-blog-detail', [self.blogs[0].pk])['ETag']
+        response = self.get('async-blog-detail', [self.blogs[0].pk], headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_comment_thread(self):
+        data = self.get('async-comment-thread', params={'blog': self.blogs[0].pk}).json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results'][0]['replies'][0]['replies']), 1)
+        self.assertEqual(self.get('async-comment-thread', params={'blog': 'x'}).status_code, 400)
+
+    def test_cached_views(self):
+        for name in ('async-tag-list', 'async-menu-list', 'async-category-list', 'async-category-tree'):
+            first = self.get(name)
+            self.assertEqual(first.status_code, 200)
+            with self.assertNumQueries(0), self.assertNumQueries(0, using=REPLICA_DB_ALIAS):
+                self.assertEqual(self.get(name).json(), first.json())
+        self.assertEqual(self.get('async-tag-detail', [self.tag.pk]).json()['name'], 'python')
+        self.assertEqual(self.get('async-menu-detail', [0]).status_code, 404)
+
+    def test_same_bodies_as_the_drf_views(self):
+        blog = self.blogs[0].pk
+        pairs = [
+            ('blog-list', 'async-blog-list', [], {'page_size': 5, 'page': 2}),
+            ('blog-detail', 'async-blog-detail', [blog], {}),
+            ('comment-list', 'async-comment-thread', [], {'blog': blog}),
+            ('tag-list', 'async-tag-list', [], {}),
+            ('tag-detail', 'async-tag-detail', [self.tag.pk], {}),
+            ('menu-list', 'async-menu-list', [], {}),
+            ('category-list', 'async-category-list', [], {}),
+            ('category-tree', 'async-category-tree', [], {}),
+        ]
+        for sync_name, async_name, args, params in pairs:
+            expected = APIClient().get(reverse(sync_name, args=args), params)
+            actual = self.get(async_name, args, params)
+            if async_name == 'async-blog-detail':
+                # List ETags cover the request path, which differs.
+                self.assertEqual(actual['ETag'], expected['ETag'])
+            expected, actual = expected.json(), actual.json()
+            if 'next' in expected:
+                # The page links point at each view's own URL.
+                for link in ('next', 'previous'):
+                    url = actual.pop(link)
+                    self.assertEqual(url and url.replace('/async/', '/'), expected.pop(link), async_name)
+            self.assertEqual(actual, expected, async_name)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.tags = [Tag.objects.create(name=name) for name in ('a', 'b')]
+        cls.blog = create_blogs(cls.author, 1, tags=cls.tags)[0]
+        cls.staff_blog = create_blogs(cls.staff, 1)[0]
+        create_thread(cls.blog, cls.author, roots=1, replies=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_staff_only(self):
+        for name in ('blog-export', 'comment-export'):
+            self.assertEqual(APIClient().get(reverse(name)).status_code, 401)
+            client = APIClient()
+            client.force_authenticate(self.author)
+            self.assertEqual(client.get(reverse(name)).status_code, 403)
+
+    def test_ndjson(self):
+        response, body = self.export('blog-export', author=self.author.pk)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="blogs.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.blog.pk])
+        self.assertEqual(list(rows[0]), BLOG_EXPORT_FIELDS)
+        self.assertEqual(rows[0]['tags'], [tag.pk for tag in self.tags])
+
+    def test_csv(self):
+        response, body = self.export('blog-export', export_format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="blogs.csv"')
+        header, *rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(header, BLOG_EXPORT_FIELDS)
+        tags = {row[0]: row[header.index('tags')] for row in rows}
+        self.assertEqual(tags, {str(self.blog.pk): f'{self.tags[0].pk};{self.tags[1].pk}', str(self.staff_blog.pk): ''})
+
+    def test_comments(self):
+        _, body = self.export('comment-export', blog=self.blog.pk, export_format='csv')
+        header, *rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(header, COMMENT_EXPORT_FIELDS)
+        self.assertEqual(len(rows), 3)
+        _, body = self.export('comment-export', blog=self.staff_blog.pk)
+        self.assertEqual(body, '')
+
+    def test_date_range(self):
+        Blog.objects.filter(pk=self.staff_blog.pk).update(created_at=timezone.now() - timedelta(days=10))
+        start, end = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        _, body = self.export('blog-export', start_date=start.isoformat(), end_date=end.isoformat())
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.blog.pk])
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('blog-export'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'message': 'export_format must be one of ndjson, csv.'})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.news = Category.objects.create(title='News')
+        cls.local = Category.objects.create(title='Local', parent=cls.news)
+        cls.city = Category.objects.create(title='City', parent=cls.local)
+        cls.sport = Category.objects.create(title='Sport')
+        cls.blogs = {
+            category.title: create_blogs(author, 1, category=category)[0]
+            for category in (cls.news, cls.local, cls.city, cls.sport)
+        }
+        cls.blogs['none'] = create_blogs(author, 1)[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def in_tree(self, category):
+        response = APIClient().get(reverse('blog-list'), {'category_tree': category.pk})
+        ids = {blog['id'] for blog in response.data['results']}
+        return sorted(title for title, blog in self.blogs.items() if blog.pk in ids)
+
+    def tree(self):
+        def titles(nodes):
+            return [(node['title'], titles(node['children'])) for node in nodes]
+        return titles(APIClient().get(reverse('category-tree')).data)
+
+    def test_subtree_filter(self):
+        self.assertEqual(self.in_tree(self.news), ['City', 'Local', 'News'])
+        self.assertEqual(self.in_tree(self.local), ['City', 'Local'])
+        self.assertEqual(self.in_tree(self.city), ['City'])
+        self.assertEqual(self.in_tree(self.sport), ['Sport'])
+
+    def test_tree_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get(reverse('category-tree'))
+        self.assertEqual(list(response.data[0]), ['id', 'title', 'children'])
+        self.assertEqual(self.tree(), [
+            ('News', [('Local', [('City', [])])]),
+            ('Sport', []),
+        ])
+
+    def test_move(self):
+        self.tree()  # Cached before the move.
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(pk=self.city.pk).move_to(Category.objects.get(pk=self.sport.pk))
+        self.assertEqual(self.tree(), [
+            ('News', [('Local', [])]),
+            ('Sport', [('City', [])]),
+        ])
+        self.assertEqual(self.in_tree(Category.objects.get(pk=self.news.pk)), ['Local', 'News'])
+        self.assertEqual(self.in_tree(Category.objects.get(pk=self.sport.pk)), ['City', 'Sport'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BlogSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+
+    def create(self, description):
+        return Blog.objects.create(
+            title='Blog', description=description, main_image='blogs/test.png', author=self.author
+        )
+
+    def test_summary_fields(self):
+        blog = self.create('<p>' + 'word ' * 250 + '</p><p>Tom &amp; Jerry</p>')
+        self.assertEqual((blog.word_count, blog.reading_time), (253, 2))
+        self.assertEqual(blog.excerpt, ' '.join(['word'] * 40) + '…')
+        self.assertTrue(blog.search_text.endswith('word Tom & Jerry'))
+
+    def test_list_omits_description(self):
+        blog = self.create('<p>Short body</p>')
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            results = APIClient().get(reverse('blog-list')).data['results']
+        self.assertNotIn('description', results[0])
+        self.assertEqual(
+            (results[0]['excerpt'], results[0]['word_count'], results[0]['reading_time']), ('Short body', 2, 1)
+        )
+        self.assertFalse(any('"description"' in query['sql'] for query in queries.captured_queries))
+        detail = APIClient().get(reverse('blog-detail', args=[blog.pk])).data
+        self.assertEqual(detail['description'], '<p>Short body</p>')
+
+    def test_update_fields_with_description(self):
+        blog = self.create('<p>One two</p>')
+        blog.description = '<p>One two three four</p>'
+        blog.save(update_fields=['description'])
+        blog = Blog.objects.get(pk=blog.pk)
+        self.assertEqual((blog.word_count, blog.excerpt, blog.search_text), (4, 'One two three four', 'One two three four'))
+
+    def test_update_fields_without_description(self):
+        blog = self.create('<p>One two</p>')
+        blog.title = 'Renamed'
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            blog.save(update_fields=['title'])
+        self.assertNotIn('word_count', queries.captured_queries[-1]['sql'])
+
+    def test_backfill(self):
+        blogs = [self.create(f'<p>{"word " * (i + 1)}</p>') for i in range(3)]
+        # Rows written before the summary fields existed.
+        Blog.objects.update(excerpt='', search_text='', word_count=0, reading_time=0)
+        output = StringIO()
+        call_command('backfill_blog_summaries', batch_size=2, stdout=output)
+        self.assertIn('Updated 3 blogs.', output.getvalue())
+        self.assertEqual(
+            list(Blog.objects.order_by('id').values_list('word_count', 'reading_time', 'excerpt')),
+            [(i + 1, 1, ' '.join(['word'] * (i + 1))) for i in range(len(blogs))],
+        )
@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import BlogViewSet, CommentViewSet, TagViewSet, MenuViewSet, CategoryViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'blogs', BlogViewSet)
@@ -8,5 +10,17 @@ router.register(r'tags', TagViewSet)
 router.register(r'menus', MenuViewSet)
 router.register(r'categories', CategoryViewSet)
 
+async_urlpatterns = [
+    path('async/blogs/', async_views.AsyncBlogListView.as_view(), name='async-blog-list'),
+    path('async/blogs/<int:pk>/', async_views.AsyncBlogDetailView.as_view(), name='async-blog-detail'),
+    path('async/comments/', async_views.AsyncCommentThreadView.as_view(), name='async-comment-thread'),
+    path('async/tags/', async_views.AsyncTagView.as_view(), name='async-tag-list'),
+    path('async/tags/<int:pk>/', async_views.AsyncTagView.as_view(), name='async-tag-detail'),
+    path('async/menus/', async_views.AsyncMenuView.as_view(), name='async-menu-list'),
+    path('async/menus/<int:pk>/', async_views.AsyncMenuView.as_view(), name='async-menu-detail'),
+    path('async/categories/', async_views.AsyncCategoryView.as_view(), name='async-category-list'),
+    path('async/categories/tree/', async_views.AsyncCategoryTreeView.as_view(), name='async-category-tree'),
+    path('async/categories/<int:pk>/', async_views.AsyncCategoryView.as_view(), name='async-category-detail'),
+]
 
-urlpatterns = router.urls
+urlpatterns = router.urls + async_urlpatterns
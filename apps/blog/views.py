@@ -1,5 +1,12 @@
+import math
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
@@ -7,35 +14,104 @@ from rest_framework.filters import SearchFilter
 from .models import Blog, Comment, Tag, Menu, Category
 from .serializers import (
     BlogSerializer,
+    BlogListSerializer,
+    BlogSearchSerializer,
     CommentSerializer,
     TagSerializer,
     MenuSerializer,
     CategorySerializer
 )
-from ..common import ReadOnly, PaginationClass
+from .caching import response_cache_key, record_cache_outcome, get_cache_stats
+from .filters import BlogFilter
+from .exporting import (
+    BLOG_EXPORT_FIELDS,
+    COMMENT_EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    apply_date_range,
+    blog_rows,
+    comment_rows,
+    render,
+)
+from .importing import import_blog_batch
+from .reactions import add_reaction, is_buffered, pending_reactions
+from .search import FullTextSearchFilter
+from ..common import ReadOnly, HybridPaginationClass, ConditionalGetMixin
 
 
-class BlogViewSet(viewsets.ModelViewSet):
+class BlogViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated | ReadOnly]
 
-    queryset = Blog.objects.all()
+    # The serializers emit author and category as ids, so only the tags need loading.
+    queryset = Blog.objects.prefetch_related('tags').order_by('-created_at', '-id')
     serializer_class = BlogSerializer
-    pagination_class = PaginationClass
-    filter_backends = [DjangoFilterBackend, SearchFilter]
-    filterset_fields = ['author', 'category', 'tags', 'active']
+    pagination_class = HybridPaginationClass
+    cursor_ordering = ('-created_at', '-id')
+    etag_fields = ('comment_count',)
+    bulk_max_rows = 1000
+    filter_backends = [DjangoFilterBackend, SearchFilter, FullTextSearchFilter]
+    filterset_class = BlogFilter
     search_fields = ['title', 'description']
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            if self.request.query_params.get(FullTextSearchFilter.search_param):
+                return BlogSearchSerializer
+            return BlogListSerializer
+        return self.serializer_class
+
     def get_queryset(self):
-        queryset = Blog.objects.all()
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        if start_date and end_date:
-            queryset = queryset.filter(created_at__range=[start_date, end_date])
-        return queryset
+        # The search text only feeds the full-text index.
+        queryset = super().get_queryset().defer('search_text')
+        if self.action == 'list':
+            queryset = queryset.defer('description')
+        return apply_date_range(
+            queryset,
+            self.request.query_params.get('start_date'),
+            self.request.query_params.get('end_date'),
+        )
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(
+            request, etag, last_modified, lambda: super(BlogViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        return self.conditional_response(
+            request, etag, last_modified, lambda: Response(self.get_serializer(instance).data)
+        )
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        return export_response(
+            request, 'blogs', BLOG_EXPORT_FIELDS, blog_rows(self.filter_queryset(self.get_queryset()))
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"message": "Expected a list of blogs."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.bulk_max_rows:
+            return Response(
+                {"message": f"At most {self.bulk_max_rows} blogs per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        created, errors = import_blog_batch(rows)
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            # Some rows were imported and some rejected.
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({"created": created, "errors": errors}, status=response_status)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.author == request.user:
+        if instance.author_id == request.user.pk:
             instance.delete()
             return Response(status=status.HTTP_200_OK)
         else:
@@ -43,7 +119,7 @@ class BlogViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.author != request.user:
+        if instance.author_id != request.user.pk:
             serializer_data = self.serializer_class(instance, data=request.data, partial=True)
             if serializer_data.is_valid():
                 serializer_data.save()
@@ -54,10 +130,51 @@ class BlogViewSet(viewsets.ModelViewSet):
             return Response({"message": "You cant delete this Blog"}, status=status.HTTP_403_FORBIDDEN)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+def export_response(request, name, fields, rows):
+    """Stream ``rows`` as NDJSON (default) or CSV chosen with ``?export_format=``."""
+    export_format = request.query_params.get('export_format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {"message": f"export_format must be one of {', '.join(EXPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    response = StreamingHttpResponse(
+        render(export_format, fields, rows), content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{export_format}"'
+    return response
+
+
+def build_comment_tree(comments):
+    """Split comments into root comments and a map of parent id -> direct replies."""
+    roots = []
+    replies_map = defaultdict(list)
+    for comment in comments:
+        if comment.parent_comment_id is None:
+            roots.append(comment)
+        else:
+            replies_map[comment.parent_comment_id].append(comment)
+    return roots, replies_map
+
+
+def subtree_timestamps(root, replies):
+    """``{id: updated_at}`` of ``root`` and its descendants among ``(id, parent id, updated_at)`` rows."""
+    children = defaultdict(list)
+    for pk, parent_id, updated_at in replies:
+        children[parent_id].append((pk, updated_at))
+    subtree, stack = {root.pk: root.updated_at}, [root.pk]
+    while stack:
+        for pk, updated_at in children[stack.pop()]:
+            subtree[pk] = updated_at
+            stack.append(pk)
+    return subtree
+
+
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated | ReadOnly]
     filter_backends = [DjangoFilterBackend]
-    pagination_class = PaginationClass
+    pagination_class = HybridPaginationClass
+    cursor_ordering = '-id'
     filterset_fields = ['blog']
 
     queryset = Comment.objects.all()
@@ -69,10 +186,90 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Comment.objects.filter(blog=blog_id)
         return self.queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_list_validators(queryset)
+        return self.conditional_response(
+            request, etag, last_modified, lambda: self.build_list_response(request, queryset)
+        )
+
+    def build_list_response(self, request, queryset):
+        if request.query_params.get('blog') and not self.paginator.is_cursor_mode(request):
+            # The whole thread of one blog is fetched at once and assembled in memory.
+            roots, replies_map = build_comment_tree(queryset)
+        else:
+            roots = queryset.filter(parent_comment__isnull=True)
+            replies_map = None
+
+        page = self.paginate_queryset(roots)
+        comments = page if page is not None else list(roots)
+        if replies_map is None:
+            thread = Comment.objects.filter(
+                blog_id__in={comment.blog_id for comment in comments},
+                parent_comment__isnull=False,
+            )
+            replies_map = build_comment_tree(thread)[1]
+
+        serializer = self.get_serializer(comments, many=True, context={
+            **self.get_serializer_context(), 'replies_map': replies_map
+        })
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        replies = Comment.objects.filter(blog_id=instance.blog_id, parent_comment__isnull=False)
+        # The comment's replies, nested, are part of the representation, so the
+        # validators cover the comment and its whole subtree.
+        subtree = subtree_timestamps(instance, replies.values_list('pk', 'parent_comment_id', 'updated_at'))
+        etag, last_modified = self.make_list_validators({
+            'last_modified': max(subtree.values()), 'count': len(subtree),
+        })
+        return self.conditional_response(
+            request, etag, last_modified, lambda: self.build_retrieve_response(instance, replies)
+        )
+
+    def build_retrieve_response(self, instance, replies):
+        replies_map = build_comment_tree(replies)[1]
+        serializer = self.get_serializer(instance, context={
+            **self.get_serializer_context(), 'replies_map': replies_map
+        })
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return export_response(request, 'comments', COMMENT_EXPORT_FIELDS, comment_rows(queryset))
+
+    @action(detail=True, methods=['post'])
+    def like(self, request, pk=None):
+        return self.react('like')
+
+    @action(detail=True, methods=['post'])
+    def dislike(self, request, pk=None):
+        return self.react('dislike')
+
+    def react(self, field):
+        instance = self.get_object()
+        add_reaction(instance.pk, field)
+        if is_buffered():
+            pending = pending_reactions(instance.pk)
+            counts = {name: getattr(instance, name) + pending[name] for name in pending}
+            return Response(counts, status=status.HTTP_202_ACCEPTED)
+        instance.refresh_from_db(fields=['like', 'dislike'])
+        return Response({'like': instance.like, 'dislike': instance.dislike}, status=status.HTTP_200_OK)
+
+    def perform_create(self, serializer):
+        # The comment and the counters it bumps are written together.
+        with transaction.atomic():
+            serializer.save()
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.author == request.user:
-            instance.delete()
+            with transaction.atomic():
+                instance.delete()
             return Response(status=status.HTTP_200_OK)
         else:
             return Response({"message": "You cant delete this comment"}, status=status.HTTP_403_FORBIDDEN)
@@ -90,40 +287,116 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Response({"message": "You cant delete this comment"}, status=status.HTTP_403_FORBIDDEN)
 
 
+def build_category_tree(categories):
+    """Nest categories ordered by (tree_id, lft), where every parent precedes its children."""
+    roots, nodes = [], {}
+    for category in categories:
+        node = {'id': category.id, 'title': category.title, 'children': []}
+        nodes[category.id] = node
+        if category.parent_id is None:
+            roots.append(node)
+        else:
+            nodes[category.parent_id]['children'].append(node)
+    return roots
+
+
+def build_tag_cloud(tags, levels=5):
+    """Tags ordered by ``-blog_count`` with a 1..``levels`` weight on a log scale of their counts."""
+    tags = list(tags)
+    if not tags:
+        return []
+    low, high = math.log(tags[-1].blog_count), math.log(tags[0].blog_count)
+    spread = (high - low) or 1
+    return [
+        {
+            'id': tag.id,
+            'name': tag.name,
+            'blog_count': tag.blog_count,
+            'weight': 1 + round((math.log(tag.blog_count) - low) / spread * (levels - 1)),
+        }
+        for tag in tags
+    ]
+
+
 class BaseViewSet(viewsets.GenericViewSet):
     # permission_classes = [IsAuthenticated]
     serializer_class = None
     queryset = None
-    
+    cache_namespace = None
+    cache_timeout = 60 * 60
+
     def list(self, request, *args, **kwargs):
-        queryset = self.queryset
+        return self.cached_response(self.build_list_data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(self.build_retrieve_data, lookup=kwargs.get(self.lookup_field))
+
+    def build_list_data(self):
+        queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serializer.data).data
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
-    def retrieve(self, request, *args, **kwargs):
+        return serializer.data
+
+    def build_retrieve_data(self):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return serializer.data
+
+    def cached_response(self, build_data, lookup=None):
+        if self.cache_namespace is None:
+            return Response(build_data())
+        key = response_cache_key(self.cache_namespace, self.request, self.action, lookup)
+        data = cache.get(key)
+        if data is None:
+            record_cache_outcome(self.cache_namespace, 'misses')
+            data = build_data()
+            cache.set(key, data, self.cache_timeout)
+        else:
+            record_cache_outcome(self.cache_namespace, 'hits')
+        return Response(data)
+
+    @action(detail=False, url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(get_cache_stats(self.cache_namespace))
 
 
 class TagViewSet(BaseViewSet):
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_namespace = 'tags'
+    cloud_size = 100
+    max_cloud_size = 500
+
+    @action(detail=False)
+    def cloud(self, request):
+        """The most used tags, read from the stored ``blog_count`` instead of counting links."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.cloud_size)), 1), self.max_cloud_size)
+        except ValueError:
+            limit = self.cloud_size
+        tags = self.get_queryset().filter(blog_count__gt=0).order_by('-blog_count', 'name')[:limit]
+        return self.cached_response(lambda: build_tag_cloud(tags))
 
 
 class MenuViewSet(BaseViewSet):
 
     queryset = Menu.objects.all()
     serializer_class = MenuSerializer
+    cache_namespace = 'menus'
 
 
 class CategoryViewSet(BaseViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'categories'
+
+    @action(detail=False)
+    def tree(self, request):
+        categories = self.get_queryset().order_by('tree_id', 'lft').only('id', 'title', 'parent')
+        return self.cached_response(lambda: build_category_tree(categories))
 
@@ -1,5 +1,10 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 
 
 class ReadOnly(BasePermission):
@@ -11,3 +16,111 @@ class PaginationClass(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class CursorPaginationClass(CursorPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+
+class HybridPaginationClass(BasePagination):
+    """
+    Page number pagination by default, keyset pagination with ``?pagination=cursor``.
+
+    Cursor mode skips the ``COUNT(*)`` and ``OFFSET`` of page numbers, so deep pages
+    cost the same as the first one. Views set ``cursor_ordering`` to the indexed
+    columns the cursor is keyed on.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.paginator = PaginationClass()
+
+    def is_cursor_mode(self, request):
+        return request.query_params.get(self.mode_query_param) == self.cursor_mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = CursorPaginationClass()
+            self.paginator.ordering = getattr(view, 'cursor_ordering', self.paginator.ordering)
+        else:
+            self.paginator = PaginationClass()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified validators for list and retrieve, derived from ``last_modified_field``.
+
+    Validators come from the instance or from one ``MAX``/``COUNT`` aggregate over the
+    filtered queryset, so a matching ``If-None-Match``/``If-Modified-Since`` gets a 304
+    before anything is serialized. ``etag_fields`` lists counters that change without
+    touching ``last_modified_field`` and so have to be part of the ETag.
+    """
+    last_modified_field = 'updated_at'
+    etag_fields = ()
+
+    def get_list_validators(self, queryset):
+        return self.make_list_validators(queryset.order_by().aggregate(**self.get_list_aggregates()))
+
+    async def aget_list_validators(self, queryset):
+        return self.make_list_validators(await queryset.order_by().aaggregate(**self.get_list_aggregates()))
+
+    def get_list_aggregates(self):
+        return {
+            'last_modified': Max(self.last_modified_field),
+            'count': Count('pk'),
+            **{field: Sum(field) for field in self.etag_fields},
+        }
+
+    def make_list_validators(self, aggregate):
+        last_modified = aggregate.pop('last_modified')
+        stamp = last_modified.isoformat() if last_modified else ''
+        return self.make_etag(f"{self.request.get_full_path()}:{stamp}:{aggregate}"), last_modified
+
+    def get_object_validators(self, instance):
+        last_modified = getattr(instance, self.last_modified_field)
+        counters = [getattr(instance, field) for field in self.etag_fields]
+        return self.make_etag(f"{instance.pk}:{last_modified.isoformat()}:{counters}"), last_modified
+
+    @staticmethod
+    def make_etag(value):
+        return 'W/' + quote_etag(hashlib.md5(value.encode(), usedforsecurity=False).hexdigest())
+
+    def conditional_response(self, request, etag, last_modified, build_response):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+        return self.set_validators(response, etag, timestamp)
+
+    async def aconditional_response(self, request, etag, last_modified, build_response):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await build_response()
+        return self.set_validators(response, etag, timestamp)
+
+    @staticmethod
+    def set_validators(response, etag, timestamp):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
@@ -0,0 +1,229 @@
+"""
+Per-request timing: SQL query count and time, serializer time and view time.
+
+``instrumentation_middleware`` sends them back in a ``Server-Timing`` header, logs
+requests slower than ``SLOW_REQUEST_MS`` with their slowest queries and adds each
+request to per-endpoint histograms, kept in memory per process and served to
+admins by ``RequestMetricsView``. The query and serializer hooks are installed by
+the middleware, so a process without it in ``MIDDLEWARE`` runs unpatched.
+"""
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in milliseconds, of the view time histogram buckets.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_current = ContextVar('request_metrics', default=None)
+_install_lock = threading.Lock()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.slowest_queries = []
+
+    def add_query(self, sql, duration):
+        self.query_count += 1
+        self.query_time += duration
+        # A bounded min-heap, so a request with thousands of queries keeps only the top few.
+        entry = (duration, self.query_count, sql)
+        if len(self.slowest_queries) < settings.SLOW_REQUEST_TOP_QUERIES:
+            heapq.heappush(self.slowest_queries, entry)
+        else:
+            heapq.heappushpop(self.slowest_queries, entry)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` handler; covers the per-thread connections of async views too."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_serializer_timer():
+    """
+    Time ``Serializer.data``; nested serializers count toward the outermost one only.
+
+    DRF has no hook around ``.data``, so the property is replaced on ``BaseSerializer``;
+    outside an instrumented request it only adds a context variable lookup.
+    """
+    original = serializers.BaseSerializer.data
+    if getattr(original.fget, 'timed', False):
+        return
+
+    def data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return original.fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    data.timed = True
+    serializers.BaseSerializer.data = property(data)
+
+
+def install_instrumentation():
+    """Install the query and serializer hooks once per process; every handler loading the middleware calls it."""
+    with _install_lock:
+        connection_created.connect(install_query_recorder, dispatch_uid='instrumentation-query-recorder')
+        # Connections opened before the middleware was loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(None, connection)
+        install_serializer_timer()
+
+
+class EndpointHistogram:
+    def __init__(self):
+        self.count = 0
+        self.view_time = 0.0
+        self.max_view_time = 0.0
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, view_time, metrics):
+        self.count += 1
+        self.view_time += view_time
+        self.max_view_time = max(self.max_view_time, view_time)
+        self.query_count += metrics.query_count
+        self.query_time += metrics.query_time
+        self.serializer_time += metrics.serializer_time
+        milliseconds = view_time * 1000
+        self.buckets[next(i for i, bound in enumerate(BUCKETS_MS) if milliseconds <= bound)] += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.view_time / self.count * 1000, 3),
+            'max_ms': round(self.max_view_time * 1000, 3),
+            'mean_queries': round(self.query_count / self.count, 2),
+            'mean_query_ms': round(self.query_time / self.count * 1000, 3),
+            'mean_serializer_ms': round(self.serializer_time / self.count * 1000, 3),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(BUCKETS_MS, self.buckets)
+            },
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def record_request(endpoint, view_time, metrics):
+    with _histograms_lock:
+        histogram = _histograms.get(endpoint)
+        if histogram is None:
+            histogram = _histograms[endpoint] = EndpointHistogram()
+        histogram.add(view_time, metrics)
+
+
+def get_histograms():
+    with _histograms_lock:
+        return {endpoint: histogram.as_dict() for endpoint, histogram in sorted(_histograms.items())}
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def endpoint_name(request):
+    match = request.resolver_match
+    # Unmatched paths share one entry, so scanning for URLs cannot grow the table.
+    return f'{request.method} {match.view_name if match else "unresolved"}'
+
+
+def finish_request(request, response, metrics, view_time):
+    response['Server-Timing'] = ', '.join([
+        f'db;dur={metrics.query_time * 1000:.2f};desc="{metrics.query_count} queries"',
+        f'serializer;dur={metrics.serializer_time * 1000:.2f}',
+        f'view;dur={view_time * 1000:.2f}',
+    ])
+    endpoint = endpoint_name(request)
+    record_request(endpoint, view_time, metrics)
+    if view_time * 1000 >= settings.SLOW_REQUEST_MS:
+        queries = '\n'.join(
+            f'  {duration * 1000:.2f} ms  {sql[:500]}'
+            for duration, _, sql in sorted(metrics.slowest_queries, reverse=True)
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms, serializers %.1f ms\n%s',
+            request.method, request.get_full_path(), endpoint, view_time * 1000,
+            metrics.query_count, metrics.query_time * 1000, metrics.serializer_time * 1000, queries,
+        )
+    return response
+
+
+@sync_and_async_middleware
+def instrumentation_middleware(get_response):
+    """Last in ``MIDDLEWARE``, so the time around ``get_response`` is the view's."""
+    install_instrumentation()
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                started = time.perf_counter()
+                response = await get_response(request)
+                return finish_request(request, response, metrics, time.perf_counter() - started)
+            finally:
+                _current.reset(token)
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            try:
+                started = time.perf_counter()
+                response = get_response(request)
+                return finish_request(request, response, metrics, time.perf_counter() - started)
+            finally:
+                _current.reset(token)
+    return middleware
+
+
+class RequestMetricsView(APIView):
+    """Per-endpoint view time histograms and mean SQL/serializer cost of this process; DELETE resets them."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_histograms())
+
+    def delete(self, request):
+        reset_histograms()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary_pin'
+
+_pinned = ContextVar('db_primary_pinned', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads of the blog models go to the ``replica`` alias, everything else to ``default``.
+
+    Reads stay on the primary while pinned (a write request or a client that wrote
+    within ``DATABASE_REPLICA_PIN_SECONDS``), inside a transaction on the primary,
+    and for objects that were loaded from the primary.
+    """
+    replica_app_labels = {'blog'}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.replica_app_labels or REPLICA_DB_ALIAS not in settings.DATABASES:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS} or None
+
+
+@sync_and_async_middleware
+def replica_pinning_middleware(get_response):
+    """
+    Pin write requests to the primary, and for ``DATABASE_REPLICA_PIN_SECONDS`` after
+    one, the same client's reads too, so it reads its own writes despite replica lag.
+    """
+    def pin_request(request):
+        return _pinned.set(request.method not in ('GET', 'HEAD', 'OPTIONS') or PIN_COOKIE in request.COOKIES)
+
+    def pin_client(request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = pin_request(request)
+            try:
+                return pin_client(request, await get_response(request))
+            finally:
+                _pinned.reset(token)
+    else:
+        def middleware(request):
+            token = pin_request(request)
+            try:
+                return pin_client(request, get_response(request))
+            finally:
+                _pinned.reset(token)
+    return middleware
@@ -0,0 +1,74 @@
+import re
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from apps.authentication.models import CustomUser
+from apps.blog.models import Blog
+from .instrumentation import install_instrumentation, reset_histograms
+
+# Tests must not need a Redis server.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+SERVER_TIMING_RE = re.compile(
+    r'^db;dur=\d+\.\d{2};desc="(\d+) queries", serializer;dur=\d+\.\d{2}, view;dur=\d+\.\d{2}$'
+)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SLOW_REQUEST_MS=60 * 1000)
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        cls.author = CustomUser.objects.create_user('author', 'author@example.com', 'password')
+        cls.blog = Blog.objects.create(
+            title='Blog', description='<p>Body</p>', main_image='blogs/test.png', author=cls.author
+        )
+
+    def setUp(self):
+        reset_histograms()
+        self.client = APIClient()
+        self.url = reverse('blog-detail', args=[self.blog.pk])
+
+    def test_server_timing(self):
+        response = self.client.get(self.url)
+        match = SERVER_TIMING_RE.match(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        # Blog, tags.
+        self.assertEqual(match.group(1), '2')
+
+    def test_hooks_are_installed_once(self):
+        self.client.get(self.url)
+        timed_data = serializers.BaseSerializer.data
+        install_instrumentation()
+        self.assertIs(serializers.BaseSerializer.data, timed_data)
+        # Outside a request the property just passes through.
+        self.assertEqual(serializers.Serializer(instance={}).data, {})
+
+    def test_slow_request_is_logged(self):
+        with self.assertNoLogs('apps.instrumentation'):
+            self.client.get(self.url)
+        with self.settings(SLOW_REQUEST_MS=0), self.assertLogs('apps.instrumentation', 'WARNING') as logs:
+            self.client.get(self.url)
+        message = logs.output[0]
+        self.assertIn(f'Slow request GET /api/blog/blogs/{self.blog.pk}/ (GET blog-detail)', message)
+        self.assertIn('2 queries', message)
+        self.assertIn('FROM "blog_blog"', message)
+
+    def test_metrics_are_admin_only(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        metrics_url = reverse('request-metrics')
+        self.assertEqual(self.client.get(metrics_url).status_code, 401)
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get(metrics_url).status_code, 403)
+        self.assertEqual(self.client.delete(metrics_url).status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        histogram = self.client.get(metrics_url).data['GET blog-detail']
+        self.assertEqual((histogram['count'], histogram['mean_queries']), (2, 2))
+        self.assertEqual(sum(histogram['buckets'].values()), 2)
+        self.assertEqual(self.client.delete(metrics_url).status_code, 204)
+        self.assertNotIn('GET blog-detail', self.client.get(metrics_url).data)
@@ -2,8 +2,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .instrumentation import RequestMetricsView
+
 
 urlpatterns = [
     path('account/', include('apps.authentication.urls')),
     path('blog/', include('apps.blog.urls')),
+    path('metrics/', RequestMetricsView.as_view(), name='request-metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,153 @@
+"""
+Concurrent throughput of the async read views under ASGI against the DRF views under WSGI.
+
+Both applications are driven in-process, without a server or sockets: the ASGI
+application by ``--concurrency`` tasks on one event loop, the WSGI application by
+a pool of ``--concurrency`` threads, against the database filled by ``benchmarks.seed``.
+
+    python -m benchmarks.asgi_vs_wsgi --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+ENDPOINTS = [
+    'blogs/',
+    'blogs/{blog}/',
+    'comments/?blog={blog}',
+    'tags/',
+    'menus/',
+    'categories/',
+    'categories/tree/',
+]
+
+
+def wsgi_call(application, url):
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    start = time.perf_counter()
+    body = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        b''.join(body)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return time.perf_counter() - start, int(status[0].split()[0])
+
+
+async def asgi_call(application, url):
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    status = []
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    disconnected = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Django listens for a disconnect while the view runs; the client never leaves.
+        await disconnected.wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    start = time.perf_counter()
+    await application(scope, receive, send)
+    return time.perf_counter() - start, status[0]
+
+
+def run_wsgi(application, urls, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: wsgi_call(application, url), urls))
+    return time.perf_counter() - start, results
+
+
+async def run_asgi(application, urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(url):
+        async with semaphore:
+            return await asgi_call(application, url)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(url) for url in urls))
+    return time.perf_counter() - start, results
+
+
+def summarize(label, elapsed, results):
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'{label:<28} {len(results) / elapsed:>9.1f} req/s'
+        f'  p50 {quantiles[49] * 1000:>7.1f} ms  p95 {quantiles[94] * 1000:>7.1f} ms  errors {errors}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint and stack.')
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    from apps.blog.models import Comment
+
+    comment = Comment.objects.order_by('id').first()
+    if comment is None:
+        sys.exit('Seed the database first: python -m benchmarks.seed')
+    wsgi_application, asgi_application = WSGIHandler(), ASGIHandler()
+
+    print(f'{args.requests} requests per endpoint, concurrency {args.concurrency}')
+    for endpoint in ENDPOINTS:
+        path = endpoint.format(blog=comment.blog_id)
+        print(path)
+        sync_urls = [f'/api/blog/{path}'] * args.requests
+        async_urls = [f'/api/blog/async/{path}'] * args.requests
+        summarize('  WSGI + DRF views', *run_wsgi(wsgi_application, sync_urls, args.concurrency))
+        summarize('  ASGI + DRF views', *asyncio.run(run_asgi(asgi_application, sync_urls, args.concurrency)))
+        summarize('  ASGI + async views', *asyncio.run(run_asgi(asgi_application, async_urls, args.concurrency)))
+
+
+if __name__ == '__main__':
+    main()
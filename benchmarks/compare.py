@@ -0,0 +1,40 @@
+"""
+Compare two JSON reports of ``benchmarks.run``, endpoint by endpoint.
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import argparse
+import json
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'throughput', 'queries']
+
+
+def change(old, new):
+    if old is None or new is None:
+        return '-'
+    if old == 0:
+        return f'{new:g}' if new else '0'
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    options = parser.parse_args()
+    with open(options.baseline) as baseline, open(options.candidate) as candidate:
+        old = {result['name']: result for result in json.load(baseline)['results']}
+        new = {result['name']: result for result in json.load(candidate)['results']}
+
+    print(f"{'endpoint':<28}" + ''.join(f'{metric:>14}' for metric in METRICS))
+    for name in sorted(old.keys() | new.keys()):
+        if name not in old or name not in new:
+            print(f"{name:<28} only in {'candidate' if name in new else 'baseline'}")
+            continue
+        print(f'{name:<28}' + ''.join(
+            f'{change(old[name][metric], new[name][metric]):>14}' for metric in METRICS
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Drive every blog and account endpoint and report latency percentiles, throughput
+and SQL query counts per endpoint, as a table and optionally as JSON.
+
+In-process (default) the Django test client is used, SQL is counted per request
+and write endpoints are rolled back after every request. With ``--base-url`` the
+requests go to a running server instead; SQL is not counted there and writes stay.
+
+    python -m benchmarks.seed --blogs 10000
+    python -m benchmarks.run --requests 200 --output results.json
+    python -m benchmarks.compare old.json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+
+class Rollback(Exception):
+    pass
+
+
+class ClientTransport:
+    """In-process requests through the test client, with the SQL of each request captured."""
+    counts_queries = True
+
+    def __init__(self):
+        from django.core import signals
+        from django.db import close_old_connections
+        from django.test import Client
+
+        # As in Django's TestCase: requests must not close the connection a rollback depends on.
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        self.client = Client()
+
+    def request(self, scenario, path, data, headers):
+        from django.db import connection, transaction
+
+        kwargs = {'headers': headers}
+        if data is not None:
+            kwargs['data'] = data
+            if not scenario.multipart:
+                kwargs['data'] = json.dumps(data)
+                kwargs['content_type'] = 'application/json'
+        connection.force_debug_cursor = True
+        connection.queries_log.clear()
+        try:
+            if scenario.write:
+                try:
+                    with transaction.atomic():
+                        elapsed, status = self.send(scenario.method, path, kwargs)
+                        raise Rollback
+                except Rollback:
+                    pass
+            else:
+                elapsed, status = self.send(scenario.method, path, kwargs)
+            queries = [query for query in connection.queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        finally:
+            connection.force_debug_cursor = False
+        return elapsed, status, len(queries), sum(float(query['time']) for query in queries)
+
+    def send(self, method, path, kwargs):
+        started = time.perf_counter()
+        response = getattr(self.client, method.lower())(path, **kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return time.perf_counter() - started, response.status_code
+
+
+class HttpTransport:
+    """Requests to a running server; the database is not visible from here."""
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, scenario, path, data, headers):
+        from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+        body = None
+        headers = dict(headers)
+        if data is not None and scenario.multipart:
+            body = encode_multipart(BOUNDARY, data)
+            headers['Content-Type'] = MULTIPART_CONTENT
+        elif data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=scenario.method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            status = error.code
+        return time.perf_counter() - started, status, None, None
+
+
+def percentile(quantiles, value):
+    return round(quantiles[value - 1] * 1000, 3)
+
+
+def run_scenario(transport, context, scenario, requests, warmup, concurrency):
+    headers = {'Authorization': f'Bearer {context.access_token}'} if scenario.auth else {}
+
+    def call(_):
+        path, data = scenario.resolve(context)
+        return transport.request(scenario, path, data, headers)
+
+    for i in range(warmup):
+        call(i)
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, range(requests)))
+    else:
+        results = [call(i) for i in range(requests)]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(result[0] for result in results)
+    if len(latencies) > 1:
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    else:
+        quantiles = latencies * 99
+    statuses = {}
+    for result in results:
+        statuses[str(result[1])] = statuses.get(str(result[1]), 0) + 1
+    report = {
+        'name': scenario.name,
+        'method': scenario.method,
+        'path': scenario.resolve(context)[0],
+        'requests': requests,
+        'statuses': statuses,
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+        'throughput': round(requests / elapsed, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': percentile(quantiles, 50),
+        'p95_ms': percentile(quantiles, 95),
+        'p99_ms': percentile(quantiles, 99),
+        'queries': None,
+        'max_queries': None,
+        'sql_ms': None,
+    }
+    if transport.counts_queries:
+        report['queries'] = round(statistics.fmean(result[2] for result in results), 2)
+        report['max_queries'] = max(result[2] for result in results)
+        report['sql_ms'] = round(statistics.fmean(result[3] for result in results) * 1000, 3)
+    return report
+
+
+def environment(options):
+    from django.db import connection
+    from apps.authentication.models import CustomUser
+    from apps.blog.models import Blog, Category, Comment, Tag
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import django
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'transport': options.base_url or 'test-client',
+        'requests': options.requests,
+        'warmup': options.warmup,
+        'concurrency': options.concurrency,
+        'dataset': {
+            'users': CustomUser.objects.count(),
+            'blogs': Blog.objects.count(),
+            'comments': Comment.objects.count(),
+            'tags': Tag.objects.count(),
+            'categories': Category.objects.count(),
+        },
+    }
+
+
+def print_table(results, stream=sys.stdout):
+    header = f"{'endpoint':<28} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'errors':>7}"
+    print(header, file=stream)
+    print('-' * len(header), file=stream)
+    for result in results:
+        queries = '-' if result['queries'] is None else f"{result['queries']:g}"
+        print(
+            f"{result['name']:<28} {result['throughput']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            f" {result['p99_ms']:>9.2f} {queries:>8} {result['errors']:>7}",
+            file=stream,
+        )
+
+
+def main():
+    from .seed import BENCH_PASSWORD, BENCH_USERNAME
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='Measured requests per endpoint.')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint first.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Client threads; only with --base-url.')
+    parser.add_argument('--base-url', help='Benchmark a running server, e.g. http://127.0.0.1:8000.')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run just these endpoints.')
+    parser.add_argument('--output', help='Write the results as JSON to this file.')
+    parser.add_argument('--username', default=BENCH_USERNAME)
+    parser.add_argument('--password', default=BENCH_PASSWORD)
+    options = parser.parse_args()
+    if options.concurrency > 1 and not options.base_url:
+        parser.error('--concurrency needs --base-url; in-process SQL counting is per request.')
+
+    import django
+    django.setup()
+    from .scenarios import SCENARIOS, Context
+
+    context = Context(options.username, options.password)
+    transport = HttpTransport(options.base_url) if options.base_url else ClientTransport()
+    results = []
+    for scenario in SCENARIOS:
+        if options.only and scenario.name not in options.only:
+            continue
+        missing = [key for key in scenario.requires if context.ids.get(key) is None]
+        if missing:
+            print(f"skipping {scenario.name}: no seeded {', '.join(missing)}", file=sys.stderr)
+            continue
+        results.append(run_scenario(
+            transport, context, scenario, options.requests, options.warmup, options.concurrency,
+        ))
+        print(f"{scenario.name}: p50 {results[-1]['p50_ms']} ms", file=sys.stderr)
+
+    print_table(results)
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump({'environment': environment(options), 'results': results}, output, indent=2)
+            output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+The endpoints the suite drives: every route of ``apps/blog/urls.py`` and
+``apps/authentication/urls.py``, with the ids and tokens they need taken from the
+seeded database.
+"""
+import io
+import itertools
+
+
+class Scenario:
+    """
+    One endpoint call. ``path`` and ``data`` may be callables taking the ``Context``,
+    for values that have to be fresh on every request. ``write`` scenarios change
+    data and are rolled back after each request when run in-process.
+    """
+
+    def __init__(self, name, method, path, data=None, auth=True, multipart=False, write=False, requires=()):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+        self.multipart = multipart
+        self.write = write
+        self.requires = requires
+
+    def resolve(self, context):
+        path = self.path(context) if callable(self.path) else self.path.format(**context.ids)
+        data = self.data(context) if callable(self.data) else self.data
+        return path, data
+
+
+class Context:
+    """Ids of seeded rows and credentials of the seeded staff user."""
+
+    def __init__(self, username, password):
+        from django.contrib.auth.tokens import default_token_generator
+        from django.utils.http import urlsafe_base64_encode
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from apps.authentication.models import CustomUser
+        from apps.blog.models import Blog, Category, Comment, Menu, Tag
+
+        self.user = CustomUser.objects.get(username=username)
+        self.password = password
+        self.access_token = str(RefreshToken.for_user(self.user).access_token)
+        other_blogs = Blog.objects.exclude(author=self.user)
+        thread = Comment.objects.order_by('id').values_list('blog_id', flat=True).first()
+        popular_tags = list(Tag.objects.order_by('-blog_count', 'name').values_list('id', flat=True)[:2])
+        self.ids = {
+            'user': self.user.id,
+            'uid': urlsafe_base64_encode(str(self.user.pk).encode()),
+            'token': default_token_generator.make_token(self.user),
+            'blog': other_blogs.order_by('-id').values_list('id', flat=True).first(),
+            'own_blog': Blog.objects.filter(author=self.user).values_list('id', flat=True).first(),
+            'thread_blog': thread,
+            'author': other_blogs.values_list('author_id', flat=True).first(),
+            'comment': Comment.objects.filter(blog_id=thread).exclude(author=self.user)
+            .values_list('id', flat=True).first(),
+            'own_comment': Comment.objects.filter(author=self.user).values_list('id', flat=True).first(),
+            'tag': Tag.objects.values_list('id', flat=True).first(),
+            'popular_tag': popular_tags[0] if popular_tags else None,
+            'second_tag': popular_tags[1] if len(popular_tags) > 1 else None,
+            'menu': Menu.objects.values_list('id', flat=True).first(),
+            'category': Category.objects.values_list('id', flat=True).first(),
+        }
+        self.counter = itertools.count()
+
+    def refresh_token(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        return str(RefreshToken.for_user(self.user))
+
+    def unique(self, prefix):
+        return f'{prefix}-{next(self.counter)}'
+
+
+def png_upload():
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile('bench.png', buffer.getvalue(), content_type='image/png')
+
+
+def blog_rows(context):
+    return [
+        {'title': context.unique('bulk'), 'description': 'Bulk imported blog', 'main_image': 'blogs/bench.png',
+         'author': context.user.id, 'tags': ['tag-0', 'tag-1']}
+        for _ in range(100)
+    ]
+
+
+BLOG = '/api/blog/'
+ACCOUNT = '/api/account/'
+
+SCENARIOS = [
+    Scenario('blog-api-root', 'GET', BLOG, auth=False),
+    Scenario('blogs-list', 'GET', BLOG + 'blogs/', auth=False),
+    Scenario('blogs-list-deep-page', 'GET', BLOG + 'blogs/?page=50', auth=False),
+    Scenario('blogs-list-cursor', 'GET', BLOG + 'blogs/?pagination=cursor', auth=False),
+    Scenario('blogs-list-filtered', 'GET', BLOG + 'blogs/?author={author}&active=true', auth=False,
+             requires=('author',)),
+    Scenario('blogs-list-category-tree', 'GET', BLOG + 'blogs/?category_tree={category}', auth=False,
+             requires=('category',)),
+    Scenario('blogs-list-tags-any', 'GET', BLOG + 'blogs/?tags={popular_tag}&tags={second_tag}', auth=False,
+             requires=('popular_tag', 'second_tag')),
+    Scenario('blogs-list-tags-all', 'GET', BLOG + 'blogs/?tags={popular_tag}&tags={second_tag}&tags_match=all',
+             auth=False, requires=('popular_tag', 'second_tag')),
+    Scenario('blogs-search-fts', 'GET', BLOG + 'blogs/?q=market%20city', auth=False),
+    Scenario('blogs-search-like', 'GET', BLOG + 'blogs/?search=market', auth=False),
+    Scenario('blogs-detail', 'GET', BLOG + 'blogs/{blog}/', auth=False, requires=('blog',)),
+    Scenario('blogs-create', 'POST', BLOG + 'blogs/', multipart=True, write=True, data=lambda context: {
+        'title': context.unique('bench'), 'description': '<p>Benchmark blog</p>', 'author': context.user.id,
+        'main_image': png_upload(),
+    }),
+    Scenario('blogs-update', 'PATCH', BLOG + 'blogs/{blog}/', data={'title': 'Benchmark update'}, write=True,
+             requires=('blog',)),
+    Scenario('blogs-destroy', 'DELETE', BLOG + 'blogs/{own_blog}/', write=True, requires=('own_blog',)),
+    Scenario('blogs-bulk', 'POST', BLOG + 'blogs/bulk/', data=blog_rows, write=True),
+    Scenario('blogs-export', 'GET', BLOG + 'blogs/export/?author={author}', requires=('author',)),
+    Scenario('comments-list', 'GET', BLOG + 'comments/', auth=False),
+    Scenario('comments-thread', 'GET', BLOG + 'comments/?blog={thread_blog}', auth=False,
+             requires=('thread_blog',)),
+    Scenario('comments-detail', 'GET', BLOG + 'comments/{comment}/', auth=False, requires=('comment',)),
+    Scenario('comments-create', 'POST', BLOG + 'comments/', write=True, requires=('thread_blog',),
+             data=lambda context: {'blog': context.ids['thread_blog'], 'author': context.user.id,
+                                   'content': 'Benchmark comment'}),
+    Scenario('comments-update', 'PATCH', BLOG + 'comments/{comment}/', data={'content': 'Edited'}, write=True,
+             requires=('comment',)),
+    Scenario('comments-destroy', 'DELETE', BLOG + 'comments/{own_comment}/', write=True,
+             requires=('own_comment',)),
+    Scenario('comments-like', 'POST', BLOG + 'comments/{comment}/like/', write=True, requires=('comment',)),
+    Scenario('comments-dislike', 'POST', BLOG + 'comments/{comment}/dislike/', write=True, requires=('comment',)),
+    Scenario('comments-export', 'GET', BLOG + 'comments/export/?blog={thread_blog}', requires=('thread_blog',)),
+    Scenario('tags-list', 'GET', BLOG + 'tags/', auth=False),
+    Scenario('tags-detail', 'GET', BLOG + 'tags/{tag}/', auth=False, requires=('tag',)),
+    Scenario('tags-cloud', 'GET', BLOG + 'tags/cloud/', auth=False),
+    Scenario('tags-cache-stats', 'GET', BLOG + 'tags/cache-stats/'),
+    Scenario('menus-list', 'GET', BLOG + 'menus/', auth=False),
+    Scenario('menus-detail', 'GET', BLOG + 'menus/{menu}/', auth=False, requires=('menu',)),
+    Scenario('categories-list', 'GET', BLOG + 'categories/', auth=False),
+    Scenario('categories-detail', 'GET', BLOG + 'categories/{category}/', auth=False, requires=('category',)),
+    Scenario('categories-tree', 'GET', BLOG + 'categories/tree/', auth=False),
+    Scenario('async-blogs-list', 'GET', BLOG + 'async/blogs/', auth=False),
+    Scenario('async-blogs-detail', 'GET', BLOG + 'async/blogs/{blog}/', auth=False, requires=('blog',)),
+    Scenario('async-comments-thread', 'GET', BLOG + 'async/comments/?blog={thread_blog}', auth=False,
+             requires=('thread_blog',)),
+    Scenario('async-tags-list', 'GET', BLOG + 'async/tags/', auth=False),
+    Scenario('async-tags-detail', 'GET', BLOG + 'async/tags/{tag}/', auth=False, requires=('tag',)),
+    Scenario('async-menus-list', 'GET', BLOG + 'async/menus/', auth=False),
+    Scenario('async-menus-detail', 'GET', BLOG + 'async/menus/{menu}/', auth=False, requires=('menu',)),
+    Scenario('async-categories-list', 'GET', BLOG + 'async/categories/', auth=False),
+    Scenario('async-categories-detail', 'GET', BLOG + 'async/categories/{category}/', auth=False,
+             requires=('category',)),
+    Scenario('async-categories-tree', 'GET', BLOG + 'async/categories/tree/', auth=False),
+
+    Scenario('account-api-root', 'GET', ACCOUNT, auth=False),
+    Scenario('register', 'POST', ACCOUNT + 'register/', auth=False, write=True, data=lambda context: {
+        'username': context.unique('bench-register'), 'email': f"{context.unique('register')}@example.com",
+        'password': 'bench-password',
+    }),
+    Scenario('register-activate', 'GET', ACCOUNT + 'register/activate/{uid}/{token}/', auth=False, write=True),
+    Scenario('login', 'POST', ACCOUNT + 'login/', auth=False, write=True,
+             data=lambda context: {'username': context.user.username, 'password': context.password}),
+    Scenario('password-reset', 'POST', ACCOUNT + 'password-reset/', auth=False, write=True,
+             data=lambda context: {'email': context.user.email}),
+    Scenario('password-reset-confirm', 'POST', ACCOUNT + 'password-reset-confirm/{uid}/{token}/', auth=False,
+             write=True, data=lambda context: {
+                 'uidb64': context.ids['uid'], 'token': context.ids['token'], 'new_password': context.password,
+             }),
+    Scenario('user-list', 'GET', ACCOUNT + 'user/'),
+    Scenario('user-detail', 'GET', ACCOUNT + 'user/{user}/'),
+    Scenario('user-update', 'PATCH', ACCOUNT + 'user/{user}/', data={'first_name': 'Bench'}, write=True),
+    Scenario('user-avatar', 'GET', ACCOUNT + 'user/{user}/avatar/', auth=False),
+    Scenario('logout', 'POST', ACCOUNT + 'logout/', write=True,
+             data=lambda context: {'refresh': context.refresh_token()}),
+    Scenario('token-obtain', 'POST', ACCOUNT + 'token/', auth=False, write=True,
+             data=lambda context: {'username': context.user.username, 'password': context.password}),
+    Scenario('token-refresh', 'POST', ACCOUNT + 'token/refresh/', auth=False, write=True,
+             data=lambda context: {'refresh': context.refresh_token()}),
+]
@@ -0,0 +1,29 @@
+"""
+Migrate the benchmark database and fill it with ``manage.py seed``, adding the
+staff user the suite authenticates as. Arguments go through to ``seed``.
+
+    python -m benchmarks.seed --blogs 100000 --tags 5000 --reply-depth 20
+"""
+import os
+import sys
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+
+def main():
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from apps.blog.models import Blog
+
+    call_command('migrate', verbosity=0)
+    if Blog.objects.exists():
+        sys.exit('The benchmark database already has data; delete benchmarks/.data/bench.sqlite3 first.')
+    call_command('seed', '--staff-username', BENCH_USERNAME, '--password', BENCH_PASSWORD, *sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()
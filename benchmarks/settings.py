@@ -0,0 +1,33 @@
+"""
+Settings for the benchmark suite: the project settings with a throwaway SQLite
+database, media root and an in-process cache, so it runs without Redis or SMTP.
+"""
+from server.settings import *  # noqa: F401,F403
+from server.settings import BASE_DIR, DATABASES
+
+DATA_DIR = BASE_DIR / 'benchmarks' / '.data'
+DATA_DIR.mkdir(exist_ok=True)
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+# One database; the read replica is left out so writes and reads see the same rows.
+DATABASES = {
+    'default': {**DATABASES['default'], 'NAME': DATA_DIR / 'bench.sqlite3'},
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+MEDIA_ROOT = DATA_DIR / 'media'
+
+# Error responses are counted in the report instead of logged.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {'django.request': {'level': 'CRITICAL'}},
+}
@@ -56,22 +56,34 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.routers.replica_pinning_middleware',
+    'apps.instrumentation.instrumentation_middleware',
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.CachedJWTAuthentication",
     ),
 }
 
+# Seconds an authenticated user's id, username and flags stay cached between
+# requests; saving or deleting the user clears the entry.
+AUTH_USER_CACHE_TIMEOUT = 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": "apps.authentication.serializers.RevocableTokenRefreshSerializer",
 }
 
+# Revoked refresh tokens are pre-checked against a per-process Bloom filter that
+# pulls new revocations this often and is rebuilt without expired ones this often.
+TOKEN_REVOCATION_FILTER_REFRESH_SECONDS = 5
+TOKEN_REVOCATION_FILTER_REBUILD_SECONDS = 60 * 60
+
 AUTH_USER_MODEL = "authentication.CustomUser"
 
 ROOT_URLCONF = 'server.urls'
@@ -98,13 +110,44 @@ WSGI_APPLICATION = 'server.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# WAL lets readers run alongside the writer, `timeout` is the busy timeout in
+# seconds and IMMEDIATE transactions take the write lock up front instead of
+# failing to upgrade a read lock. Connections are reused for CONN_MAX_AGE seconds.
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    # Reads of the blog models; point NAME at the replica's copy of the database.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['apps.routers.PrimaryReplicaRouter']
+
+# Seconds a client's reads stay on the primary after it wrote something.
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+# Requests whose view takes at least this many milliseconds are logged with
+# their slowest queries.
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_TOP_QUERIES = 5
+
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
@@ -119,6 +162,10 @@ CACHES = {
     }
 }
 
+# Buffer comment likes/dislikes in the cache and write them in batches with
+# `manage.py flush_comment_reactions`.
+COMMENT_REACTIONS_BUFFERED = False
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -157,6 +204,11 @@ STATIC_URL = 'static/'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Widths of the WebP variants generated for blog main images, and the size of the
+# process pool that renders them (0 renders inline).
+BLOG_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+BLOG_IMAGE_WORKERS = 2
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -171,6 +223,15 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = "gmail here"
 EMAIL_HOST_PASSWORD = "password here"
 
+# Activation and password-reset mail goes through the outbox table and is sent by
+# `manage.py send_outbox_email`; failed sends retry with exponential backoff.
+# A worker leases the emails it is sending; if it dies, they are due again after
+# EMAIL_OUTBOX_LEASE_SECONDS, which must exceed the time to send one batch.
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 60 * 60
+EMAIL_OUTBOX_LEASE_SECONDS = 10 * 60
+
 TINYMCE_DEFAULT_CONFIG = {
     "height": 500,
     "width": 800,